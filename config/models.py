@@ -1,6 +1,8 @@
 import os
 import warnings
+from typing import Optional
 
+import httpx
 from dotenv import load_dotenv
 from openai import AsyncAzureOpenAI, AzureOpenAI
 
@@ -17,14 +19,26 @@ client = AzureOpenAI(
     api_key=os.getenv("AZURE_OPENAI_API_KEY"),
 )
 
+_async_client: Optional[AsyncAzureOpenAI] = None
+
 
 def get_client() -> AzureOpenAI:
     return client
 
 
 def get_async_client() -> AsyncAzureOpenAI:
-    return AsyncAzureOpenAI(
-        api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    )
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncAzureOpenAI(
+            api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
+            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+            # One pooled HTTP/2 client for the process; concurrent requests multiplex over few connections
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=200, max_keepalive_connections=200, keepalive_expiry=120),
+                # Read timeout is a backstop; analyzers enforce their own per-request timeout
+                timeout=httpx.Timeout(connect=5, read=60, write=10, pool=5),
+                http2=True,
+            ),
+        )
+    return _async_client
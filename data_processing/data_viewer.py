@@ -1,58 +1,164 @@
 import streamlit as st
 import pickle
 import pandas as pd
+import pyarrow.parquet as pq
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from labeling.label_store import labels_version, load_labels
 
 st.set_page_config(page_title="Transcript Data Viewer", layout="wide")
 
-@st.cache_data
-def load_data():
-    # Get the path to the data file (works from any directory)
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    file_path = os.path.join(script_dir, '..', 'data', 'processed', 'transcripts_cleaned.pkl')
+# Get the path to the data files (works from any directory)
+PROCESSED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'processed')
+PICKLE_PATH = os.path.join(PROCESSED_DIR, 'transcripts_cleaned.pkl')
+META_PATH = os.path.join(PROCESSED_DIR, 'transcripts_meta.parquet')
+TEXT_PATH = os.path.join(PROCESSED_DIR, 'transcripts_text.parquet')
 
-    with open(file_path, 'rb') as f:
+SPEAKER_EMOJI = {'Executives': '👔', 'Analysts': '📊'}
+
+def convert_to_parquet():
+    """Split the cleaned pickle into a metadata file and a text-only file keyed by component ID"""
+    with open(PICKLE_PATH, 'rb') as f:
         df = pickle.load(f)
     
     if df.columns.duplicated().any():
         df = df.loc[:, ~df.columns.duplicated()]
     
+    # Duplicate detection runs on the hash so the full text never has to be resident
+    df['componenttext_hash'] = pd.util.hash_pandas_object(df['componenttext'], index=False).to_numpy()
+    
+    df.drop(columns=['componenttext']).to_parquet(META_PATH, index=False)
+    df[['transcriptcomponentid', 'componenttext']].sort_values('transcriptcomponentid').to_parquet(
+        TEXT_PATH, index=False, row_group_size=5000
+    )
+
+def needs_conversion():
+    if not (os.path.exists(META_PATH) and os.path.exists(TEXT_PATH)):
+        return True
+    return os.path.exists(PICKLE_PATH) and os.path.getmtime(PICKLE_PATH) > os.path.getmtime(META_PATH)
+
+def data_version() -> str:
+    """Cache key built from the pickle and metadata mtimes, so a re-cleaned dataset is picked up on rerun"""
+    if needs_conversion():
+        convert_to_parquet()
+    pickle_mtime = os.path.getmtime(PICKLE_PATH) if os.path.exists(PICKLE_PATH) else None
+    return f"{pickle_mtime}-{os.path.getmtime(META_PATH)}"
+
+@st.cache_data
+def load_data(df_version: str):
+    """Metadata for one version of the Parquet files (see data_version)"""
+    df = pd.read_parquet(META_PATH)
+    df['speaker_emoji'] = df['speakertypename'].map(SPEAKER_EMOJI).fillna('📢')
     return df
 
-df = load_data()
+def read_component_text(component_ids) -> dict:
+    """Read the full text for the given components only (row groups are pruned by ID)"""
+    if len(component_ids) == 0:
+        return {}
+    table = pq.read_table(
+        TEXT_PATH,
+        columns=['transcriptcomponentid', 'componenttext'],
+        filters=[('transcriptcomponentid', 'in', list(component_ids))]
+    )
+    return dict(zip(table.column('transcriptcomponentid').to_pylist(), table.column('componenttext').to_pylist()))
+
+@st.cache_data
+def load_component_text(df_version: str, component_ids: tuple) -> dict:
+    """Cached text for a small set of components (one transcript or one row)"""
+    return read_component_text(component_ids)
+
+@st.cache_data
+def sidebar_options(df_version: str) -> dict:
+    """Sorted filter values, computed once per version of the metadata file"""
+    df = load_data(df_version)
+    return {
+        'companies': sorted(df['companyname'].dropna().unique().tolist()),
+        'speaker_types': sorted(df['speakertypename'].dropna().unique().tolist()),
+        'component_types': sorted(df['transcriptcomponenttypename'].dropna().unique().tolist())
+    }
+
+def apply_filters(df, company, speaker, component):
+    active = [
+        (col, value) for col, value in [
+            ('companyname', company),
+            ('speakertypename', speaker),
+            ('transcriptcomponenttypename', component)
+        ] if value != "All"
+    ]
+    if not active:
+        return df
+    
+    mask = df[active[0][0]] == active[0][1]
+    for col, value in active[1:]:
+        mask &= df[col] == value
+    return df.loc[mask]
+
+@st.cache_data
+def event_lookup(df_version: str, company: str, speaker: str, component: str) -> dict:
+    """Map each event's display label to its (company, headline, date) key under the given filters"""
+    events = apply_filters(load_data(df_version), company, speaker, component).groupby(
+        ['companyname', 'headline', 'mostimportantdateutc']
+    ).size().reset_index()
+    display = (
+        events['companyname'].astype(str) + " - " + events['headline'].astype(str) +
+        " (" + events['mostimportantdateutc'].astype(str) + ")"
+    )
+    return dict(zip(display, zip(events['companyname'], events['headline'], events['mostimportantdateutc'])))
+
+@st.cache_data
+def export_csv_with_text(df_version: str, company: str, speaker: str, component: str, columns: tuple) -> bytes:
+    """CSV of the filtered rows with their full component text; the IDs are resolved here to keep the cache key small"""
+    filtered = apply_filters(load_data(df_version), company, speaker, component)
+    texts = read_component_text(filtered['transcriptcomponentid'].tolist())
+    return filtered[list(columns)].assign(
+        componenttext=filtered['transcriptcomponentid'].map(texts)
+    ).to_csv(index=False).encode()
+
+@st.cache_data
+def filter_summary(df_version: str, company: str, speaker: str, component: str) -> dict:
+    """Headline metrics for one filter combination, computed once and then looked up on reruns"""
+    filtered = apply_filters(load_data(df_version), company, speaker, component)
+    return {
+        'records': len(filtered),
+        'companies': int(filtered['companyid'].nunique()),
+        'transcripts': int(filtered['transcriptid'].nunique()),
+        'total_words': int(filtered['word_count'].sum()),
+        'avg_words': int(filtered['word_count'].mean()) if len(filtered) > 0 else 0
+    }
+
+df_version = data_version()
+df = load_data(df_version)
+options = sidebar_options(df_version)
 
 st.title("📊 Earning Call Transcripts - First 100 Companies (CLEANED DATA)")
 
 st.sidebar.header("🔍 Filters")
-companies = sorted(df['companyname'].dropna().unique())
-selected_company = st.sidebar.selectbox("Select Company", ["All"] + list(companies))
+selected_company = st.sidebar.selectbox("Select Company", ["All"] + options['companies'])
 
-speaker_types = ['All'] + sorted(df['speakertypename'].dropna().unique().tolist())
+speaker_types = ['All'] + options['speaker_types']
 selected_speaker = st.sidebar.selectbox("Speaker Type", speaker_types)
 
-component_types = ['All'] + sorted(df['transcriptcomponenttypename'].dropna().unique().tolist())
+component_types = ['All'] + options['component_types']
 selected_component = st.sidebar.selectbox("Component Type", component_types)
 
-filtered_df = df.copy()
-if selected_company != "All":
-    filtered_df = filtered_df[filtered_df['companyname'] == selected_company]
-if selected_speaker != "All":
-    filtered_df = filtered_df[filtered_df['speakertypename'] == selected_speaker]
-if selected_component != "All":
-    filtered_df = filtered_df[filtered_df['transcriptcomponenttypename'] == selected_component]
+filtered_df = apply_filters(df, selected_company, selected_speaker, selected_component)
+summary = filter_summary(df_version, selected_company, selected_speaker, selected_component)
 
 st.sidebar.markdown("---")
-st.sidebar.metric("Total Records", f"{len(filtered_df):,}")
-st.sidebar.metric("Unique Companies", int(filtered_df['companyid'].nunique()))
-st.sidebar.metric("Unique Transcripts", int(filtered_df['transcriptid'].nunique()))
+st.sidebar.metric("Total Records", f"{summary['records']:,}")
+st.sidebar.metric("Unique Companies", summary['companies'])
+st.sidebar.metric("Unique Transcripts", summary['transcripts'])
 
 col1, col2, col3 = st.columns(3)
 with col1:
-    st.metric("📝 Total Words", f"{int(filtered_df['word_count'].sum()):,}")
+    st.metric("📝 Total Words", f"{summary['total_words']:,}")
 with col2:
-    st.metric("📊 Avg Words/Component", f"{int(filtered_df['word_count'].mean())}")
+    st.metric("📊 Avg Words/Component", f"{summary['avg_words']}")
 with col3:
-    st.metric("🎤 Total Components", f"{len(filtered_df):,}")
+    st.metric("🎤 Total Components", f"{summary['records']:,}")
 
 tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["📋 Overview", "📄 Transcript Viewer", "🔎 Raw Data Explorer", "📊 Column Info", "🔁 Duplicates", "🏷️ Labeled Data"])
 
@@ -60,7 +166,7 @@ with tab1:
     st.header("Company Overview")
     company_stats = filtered_df.groupby('companyname').agg({
         'transcriptid': 'nunique',
-        'componenttext': 'count',
+        'transcriptcomponentid': 'count',
         'word_count': 'sum',
         'mostimportantdateutc': lambda x: f"{x.min()} to {x.max()}"
     }).reset_index()
@@ -85,30 +191,22 @@ with tab1:
 with tab2:
     st.header("Transcript Viewer")
     
-    # Create unique event list (one per company+headline+date combination)
-    event_options = filtered_df.groupby(['companyname', 'headline', 'mostimportantdateutc']).agg({
-        'transcriptid': 'first'  # Just take the first transcript ID (they should be unified now)
-    }).reset_index()
-    event_options['display'] = event_options.apply(
-        lambda x: f"{x['companyname']} - {x['headline']} ({x['mostimportantdateutc']})", axis=1
-    )
+    # One entry per company+headline+date combination (each is under a single transcript ID now)
+    event_keys = event_lookup(df_version, selected_company, selected_speaker, selected_component)
     
     selected_event_display = st.selectbox(
         "Select Event to View",
-        event_options['display'].tolist()
+        list(event_keys)
     )
     
     if selected_event_display:
-        selected_idx = event_options[event_options['display'] == selected_event_display].index[0]
-        selected_company = event_options.iloc[selected_idx]['companyname']
-        selected_headline = event_options.iloc[selected_idx]['headline']
-        selected_date = event_options.iloc[selected_idx]['mostimportantdateutc']
+        event_company, event_headline, event_date = event_keys[selected_event_display]
         
         # Get all data for this event (should be under single transcript ID now)
         transcript_data = filtered_df[
-            (filtered_df['companyname'] == selected_company) &
-            (filtered_df['headline'] == selected_headline) &
-            (filtered_df['mostimportantdateutc'] == selected_date)
+            (filtered_df['companyname'] == event_company) &
+            (filtered_df['headline'] == event_headline) &
+            (filtered_df['mostimportantdateutc'] == event_date)
         ].sort_values('componentorder')
         
         st.subheader(f"📄 {transcript_data.iloc[0]['headline']}")
@@ -125,7 +223,7 @@ with tab2:
             st.write(f"**Components:** {len(transcript_data)}")
         
         # Check for duplicates in this specific transcript
-        transcript_duplicates = transcript_data[transcript_data.duplicated(subset=['componenttext'], keep=False)]
+        transcript_duplicates = transcript_data[transcript_data.duplicated(subset=['componenttext_hash'], keep=False)]
         if len(transcript_duplicates) > 0:
             st.warning(f"⚠️ {len(transcript_duplicates)} duplicate components found in this transcript!")
         else:
@@ -134,25 +232,28 @@ with tab2:
         st.markdown("---")
         st.subheader("📝 Full Transcript (in order)")
         
-        for idx, row in transcript_data.iterrows():
-            speaker_emoji = "👔" if row['speakertypename'] == "Executives" else "📊" if row['speakertypename'] == "Analysts" else "📢"
-            
-            # Check if this specific component is duplicated
-            is_duplicate = len(transcript_data[transcript_data['componenttext'] == row['componenttext']]) > 1
-            duplicate_badge = " 🔁 DUPLICATE" if is_duplicate else ""
+        component_texts = load_component_text(df_version, tuple(transcript_data['transcriptcomponentid'].tolist()))
+        
+        # Flag components whose text appears more than once in this transcript
+        transcript_rows = transcript_data.assign(
+            is_duplicate=transcript_data.duplicated(subset=['componenttext_hash'], keep=False)
+        )
+        
+        for row in transcript_rows.itertuples():
+            duplicate_badge = " 🔁 DUPLICATE" if row.is_duplicate else ""
             
             with st.expander(
-                f"{speaker_emoji} Component #{row['componentorder']} - {row['transcriptpersonname']} "
-                f"({row['speakertypename']}, {row['transcriptcomponenttypename']}, {row['word_count']} words){duplicate_badge}",
+                f"{row.speaker_emoji} Component #{row.componentorder} - {row.transcriptpersonname} "
+                f"({row.speakertypename}, {row.transcriptcomponenttypename}, {row.word_count} words){duplicate_badge}",
                 expanded=False
             ):
-                st.markdown(f"**Speaker:** {row['transcriptpersonname']}")
-                st.markdown(f"**Type:** {row['speakertypename']} - {row['transcriptcomponenttypename']}")
-                st.markdown(f"**Word Count:** {row['word_count']}")
-                if is_duplicate:
+                st.markdown(f"**Speaker:** {row.transcriptpersonname}")
+                st.markdown(f"**Type:** {row.speakertypename} - {row.transcriptcomponenttypename}")
+                st.markdown(f"**Word Count:** {row.word_count}")
+                if row.is_duplicate:
                     st.error("⚠️ This exact text appears multiple times in this transcript!")
                 st.markdown("**Full Text:**")
-                st.text_area("", row['componenttext'], height=200, key=f"text_{idx}", label_visibility="collapsed")
+                st.text_area("", component_texts.get(row.transcriptcomponentid, ''), height=200, key=f"text_{row.Index}", label_visibility="collapsed")
 
 with tab3:
     st.header("🔎 Raw Data Explorer")
@@ -198,18 +299,24 @@ with tab3:
         
         # 📝 Text Content
         'componenttextpreview',
-        'word_count',
-        'componenttext'
+        'word_count'
     ]
     
     st.subheader("📊 Complete Data Table")
-    st.caption("All 29 columns displayed in logical order: Company → Event → Transcript → Component → Speaker → Text")
+    st.caption("28 columns displayed in logical order: Company → Event → Transcript → Component → Speaker → Text. Full component text is loaded on demand in the Row Inspector.")
     
     st.dataframe(filtered_df[ordered_columns], use_container_width=True, height=500)
     
+    if st.checkbox("Include full component text in CSV export"):
+        export_data = export_csv_with_text(
+            df_version, selected_company, selected_speaker, selected_component, tuple(ordered_columns)
+        )
+    else:
+        export_data = filtered_df[ordered_columns].to_csv(index=False)
+    
     st.download_button(
         label="⬇️ Download Filtered Data as CSV",
-        data=filtered_df[ordered_columns].to_csv(index=False),
+        data=export_data,
         file_name="filtered_transcripts.csv",
         mime="text/csv"
     )
@@ -224,7 +331,7 @@ with tab3:
         row_data = filtered_df.iloc[row_num]
         
         # Check if this component text is duplicated
-        component_duplicates = df[df['componenttext'] == row_data['componenttext']]
+        component_duplicates = df[df['componenttext_hash'] == row_data['componenttext_hash']]
         is_duplicate = len(component_duplicates) > 1
         
         if is_duplicate:
@@ -282,7 +389,8 @@ with tab3:
         
         st.markdown("---")
         st.markdown("### 📝 Full Component Text (What Was Actually Said)")
-        st.text_area("", row_data['componenttext'], height=300, key="detailed_text", label_visibility="collapsed")
+        row_text = load_component_text(df_version, (row_data['transcriptcomponentid'],)).get(row_data['transcriptcomponentid'], '')
+        st.text_area("", row_text, height=300, key="detailed_text", label_visibility="collapsed")
         
         # Show duplicate details if this is a duplicate
         if is_duplicate:
@@ -348,7 +456,7 @@ with tab4:
             "Category": cat,
             "Column Name": col, 
             "Description": desc, 
-            "Data Type": str(df[col].dtype)
+            "Data Type": str(df[col].dtype) if col in df.columns else "object (loaded on demand)"
         }
         for col, (cat, desc) in column_info.items()
     ])
@@ -361,13 +469,16 @@ with tab5:
     st.header("🔁 Duplicate Analysis")
     
     if st.button("🔍 Analyze Duplicates in Filtered Data"):
-        duplicate_texts = filtered_df[filtered_df.duplicated(subset=['componenttext'], keep=False)]
+        duplicate_texts = filtered_df[filtered_df.duplicated(subset=['componenttext_hash'], keep=False)]
         st.metric("Duplicate Component Texts Found", len(duplicate_texts))
         
         if len(duplicate_texts) > 0:
             st.warning(f"⚠️ Found {len(duplicate_texts)} duplicate component texts!")
             
-            dup_groups = duplicate_texts.groupby('componenttext').size().reset_index(name='count')
+            dup_groups = duplicate_texts.groupby('componenttext_hash').agg(
+                componenttextpreview=('componenttextpreview', 'first'),
+                count=('componenttextpreview', 'size')
+            ).reset_index(drop=True)
             dup_groups = dup_groups.sort_values('count', ascending=False)
             
             st.subheader(f"Found {len(dup_groups)} unique texts that are duplicated")
@@ -375,9 +486,9 @@ with tab5:
             
             st.subheader("Duplicate Records Details")
             st.dataframe(
-                duplicate_texts[['companyname', 'headline', 'mostimportantdateutc', 
+                duplicate_texts.sort_values('componenttext_hash')[['companyname', 'headline', 'mostimportantdateutc', 
                                 'speakertypename', 'transcriptpersonname', 'componentorder', 
-                                'componenttextpreview']].sort_values('componenttext'),
+                                'componenttextpreview']],
                 use_container_width=True,
                 height=400
             )
@@ -412,14 +523,15 @@ with tab6:
                 format_func=lambda x: x.replace('sample_20_labeled_', '').replace('.pkl', '').replace('_', ' ').title()
             )
 
-        # Load selected labeled data
+        # Load selected labeled data, including edits still in the reviewer's change log
+        # Keyed by the snapshot and log mtimes so newly saved labels are picked up
         @st.cache_data
-        def load_labeled_data(filename):
-            file_path = os.path.join(labeled_dir, filename)
-            with open(file_path, 'rb') as f:
-                return pickle.load(f)
+        def load_labeled_data(filename, version):
+            return load_labels(os.path.join(labeled_dir, filename))
 
-        labeled_df = load_labeled_data(selected_labeled_file)
+        labeled_df = load_labeled_data(
+            selected_labeled_file, labels_version(os.path.join(labeled_dir, selected_labeled_file))
+        )
 
         # Initialize session state for labeled data navigation
         if 'labeled_current_idx' not in st.session_state:
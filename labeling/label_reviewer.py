@@ -5,8 +5,14 @@ Shows the presentation text and allows editing the sentiment tag
 """
 
 import streamlit as st
-import pickle
+import sys
 import pandas as pd
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from labeling.label_store import append_change, apply_change, load_labels, read_changes, write_snapshot
 
 # Page config
 st.set_page_config(
@@ -15,19 +21,33 @@ st.set_page_config(
     layout="wide"
 )
 
-# Load labeled dataset
-@st.cache_data
-def load_data():
-    with open('data/labeled/sample_20_labeled.pkl', 'rb') as f:
-        return pickle.load(f)
+DATA_PATH = Path('data/labeled/sample_20_labeled.pkl')
+COMPACT_EVERY = 10  # write a fresh snapshot after this many logged edits
+
+def save_snapshot(df):
+    write_snapshot(DATA_PATH, df)
+    st.session_state.pending_changes = 0
 
-def save_data(df):
-    with open('data/labeled/sample_20_labeled.pkl', 'wb') as f:
-        pickle.dump(df, f)
+def save_change(df, idx, user_sentiment, user_notes, label_changed):
+    """Append one edit to the change log, compacting into a new snapshot every COMPACT_EVERY edits"""
+    change = {
+        'idx': int(idx),
+        'user_sentiment': user_sentiment,
+        'user_notes': user_notes,
+        'label_changed': bool(label_changed),
+        'ts': datetime.now().isoformat()
+    }
+    append_change(DATA_PATH, change)
+    apply_change(df, change)
+    
+    st.session_state.pending_changes += 1
+    if st.session_state.pending_changes >= COMPACT_EVERY:
+        save_snapshot(df)
 
 # Initialize session state
 if 'df' not in st.session_state:
-    st.session_state.df = load_data()
+    st.session_state.df = load_labels(DATA_PATH)
+    st.session_state.pending_changes = len(read_changes(DATA_PATH))
 if 'current_idx' not in st.session_state:
     st.session_state.current_idx = 0
 
@@ -68,17 +88,23 @@ with col_nav:
     st.subheader("📍 Navigation")
     
     # Event list with sentiment indicators
-    for i in range(len(df)):
-        sentiment = df.iloc[i]['user_sentiment']
-        emoji = {'positive': '✅', 'negative': '❌', 'neutral': '⚪'}[sentiment]
-        changed = '🔄' if df.iloc[i]['label_changed'] else ''
-        
-        label = f"{emoji}{changed} {i+1}. {df.iloc[i]['companyname'][:20]}"
-        
-        if st.button(label, key=f"nav_{i}", use_container_width=True, 
-                     type="primary" if i == st.session_state.current_idx else "secondary"):
-            st.session_state.current_idx = i
-            st.rerun()
+    sentiment_emoji = {'positive': '✅', 'negative': '❌', 'neutral': '⚪'}
+    labels = [
+        f"{sentiment_emoji[sentiment]}{'🔄' if changed else ''} {i+1}. {name[:20]}"
+        for i, (sentiment, changed, name) in enumerate(
+            zip(df['user_sentiment'], df['label_changed'], df['companyname'])
+        )
+    ]
+    
+    choice = st.selectbox(
+        "Event",
+        range(len(df)),
+        format_func=lambda i: labels[i],
+        index=st.session_state.current_idx
+    )
+    if choice != st.session_state.current_idx:
+        st.session_state.current_idx = choice
+        st.rerun()
     
     st.markdown("---")
     
@@ -174,13 +200,8 @@ with col_main:
         # Check if changed
         label_changed = user_sentiment != row['ai_sentiment']
         
-        # Update
-        df.at[idx, 'user_sentiment'] = user_sentiment
-        df.at[idx, 'user_notes'] = user_notes
-        df.at[idx, 'label_changed'] = label_changed
-        
-        # Save
-        save_data(df)
+        # Log the edit
+        save_change(df, idx, user_sentiment, user_notes, label_changed)
         st.session_state.df = df
         
         st.success("✅ Saved!")
@@ -190,6 +211,7 @@ with col_main:
             st.session_state.current_idx += 1
             st.rerun()
         else:
+            save_snapshot(df)
             st.balloons()
             st.info("🎉 All events reviewed!")
 
@@ -0,0 +1,60 @@
+"""
+Labeled Dataset Storage
+A labeled dataset is a pickle snapshot plus an append-only JSONL log of reviewer edits.
+Readers go through load_labels so they always see every saved edit.
+"""
+
+import pickle
+import orjson
+from pathlib import Path
+
+
+def changes_path(snapshot_path):
+    """Change log that sits next to a snapshot, e.g. sample_20_labeled_changes.jsonl"""
+    snapshot_path = Path(snapshot_path)
+    return snapshot_path.with_name(f"{snapshot_path.stem}_changes.jsonl")
+
+
+def labels_version(snapshot_path):
+    """Modification times of the snapshot and its change log, for use as a cache key"""
+    log = changes_path(snapshot_path)
+    return Path(snapshot_path).stat().st_mtime, log.stat().st_mtime if log.exists() else None
+
+
+def read_changes(snapshot_path):
+    log = changes_path(snapshot_path)
+    if not log.exists():
+        return []
+    return [orjson.loads(line) for line in log.read_bytes().splitlines() if line.strip()]
+
+
+def apply_change(df, change):
+    idx = change['idx']
+    df.at[idx, 'user_sentiment'] = change['user_sentiment']
+    df.at[idx, 'user_notes'] = change['user_notes']
+    df.at[idx, 'label_changed'] = change['label_changed']
+
+
+def load_snapshot(snapshot_path):
+    with open(snapshot_path, 'rb') as f:
+        return pickle.load(f)
+
+
+def load_labels(snapshot_path):
+    """Latest snapshot with the logged edits replayed on top"""
+    df = load_snapshot(snapshot_path)
+    for change in read_changes(snapshot_path):
+        apply_change(df, change)
+    return df
+
+
+def append_change(snapshot_path, change):
+    with open(changes_path(snapshot_path), 'ab') as f:
+        f.write(orjson.dumps(change) + b'\n')
+
+
+def write_snapshot(snapshot_path, df):
+    """Write a fresh snapshot and drop the edits it now contains"""
+    with open(snapshot_path, 'wb') as f:
+        pickle.dump(df, f)
+    changes_path(snapshot_path).unlink(missing_ok=True)
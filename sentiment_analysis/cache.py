@@ -0,0 +1,28 @@
+import hashlib
+from typing import Dict, List, Optional
+
+import diskcache
+
+
+class ResponseCache:
+    """On-disk cache of parsed sentiment results, keyed by the exact request content"""
+    
+    def __init__(self, cache_dir="data/.sentiment_cache"):
+        self.cache = diskcache.Cache(cache_dir)
+    
+    @staticmethod
+    def make_key(messages: List[Dict], model: str, temperature: float) -> str:
+        """sha256 of system prompt + user prompt + model + temperature"""
+        payload = ''.join(m['content'] for m in messages) + model + f"{temperature}"
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """Stored result marked as a cache hit; nothing is billed for it in this run"""
+        result = self.cache.get(key)
+        if result is None:
+            return None
+        return {**result, 'input_tokens': 0, 'cached_tokens': 0, 'output_tokens': 0,
+                'total_tokens': 0, 'cost': 0.0, 'attempts': 0, 'cached': True}
+    
+    def set(self, key: str, result: Dict):
+        self.cache.set(key, result)
@@ -1,9 +1,11 @@
-import json
 import sys
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List
 
+import orjson
+import pandas as pd
+
 sys.path.append(str(Path(__file__).parent.parent))
 
 
@@ -14,13 +16,14 @@ class CostLogger:
         self.session_costs = []
         
     def log_request(self, model: str, input_tokens: int, output_tokens: int, 
-                   cost: float, metadata: Dict = None):
+                   cost: float, metadata: Dict = None, cached_tokens: int = 0):
         """Log a single API request"""
         
         log_entry = {
             'timestamp': datetime.now().isoformat(),
             'model': model,
             'input_tokens': input_tokens,
+            'cached_tokens': cached_tokens,
             'output_tokens': output_tokens,
             'total_tokens': input_tokens + output_tokens,
             'cost': cost,
@@ -28,8 +31,8 @@ class CostLogger:
         }
         
         # Append to JSONL file
-        with open(self.log_file, 'a') as f:
-            f.write(json.dumps(log_entry) + '\n')
+        with open(self.log_file, 'ab') as f:
+            f.write(orjson.dumps(log_entry) + b'\n')
         
         # Track in session
         self.session_costs.append(log_entry)
@@ -41,6 +44,7 @@ class CostLogger:
             return {
                 'total_requests': 0,
                 'total_input_tokens': 0,
+                'total_cached_tokens': 0,
                 'total_output_tokens': 0,
                 'total_cost': 0.0
             }
@@ -48,6 +52,7 @@ class CostLogger:
         return {
             'total_requests': len(self.session_costs),
             'total_input_tokens': sum(e['input_tokens'] for e in self.session_costs),
+            'total_cached_tokens': sum(e['cached_tokens'] for e in self.session_costs),
             'total_output_tokens': sum(e['output_tokens'] for e in self.session_costs),
             'total_cost': sum(e['cost'] for e in self.session_costs)
         }
@@ -59,6 +64,7 @@ class CostLogger:
         print("\nSESSION COST SUMMARY")
         print(f"Total requests:    {summary['total_requests']}")
         print(f"Input tokens:      {summary['total_input_tokens']:,}")
+        print(f"Cached tokens:     {summary['total_cached_tokens']:,}")
         print(f"Output tokens:     {summary['total_output_tokens']:,}")
         print(f"Total tokens:      {summary['total_input_tokens'] + summary['total_output_tokens']:,}")
         print(f"Total cost:        ${summary['total_cost']:.4f}")
@@ -71,47 +77,32 @@ class CostLogger:
         if not log_path.exists():
             return []
         
-        logs = []
-        with open(log_path, 'r') as f:
-            for line in f:
-                logs.append(json.loads(line.strip()))
-        
-        return logs
+        return [orjson.loads(line) for line in log_path.read_bytes().splitlines() if line.strip()]
     
     @staticmethod
     def get_total_project_cost(log_file="data/results/cost_log.jsonl") -> Dict:
         """Get total project cost from all logs"""
         
-        logs = CostLogger.load_all_logs(log_file)
-        
-        if not logs:
+        log_path = Path(log_file)
+        if not log_path.exists() or log_path.stat().st_size == 0:
             return {
                 'total_requests': 0,
                 'total_cost': 0.0,
                 'by_model': {}
             }
         
-        total_cost = sum(e['cost'] for e in logs)
-        total_requests = len(logs)
+        df = pd.read_json(log_path, lines=True)
         
         # Group by model
-        by_model = {}
-        for log in logs:
-            model = log['model']
-            if model not in by_model:
-                by_model[model] = {
-                    'requests': 0,
-                    'input_tokens': 0,
-                    'output_tokens': 0,
-                    'cost': 0.0
-                }
-            by_model[model]['requests'] += 1
-            by_model[model]['input_tokens'] += log['input_tokens']
-            by_model[model]['output_tokens'] += log['output_tokens']
-            by_model[model]['cost'] += log['cost']
+        by_model = df.groupby('model', observed=True).agg(
+            requests=('cost', 'size'),
+            input_tokens=('input_tokens', 'sum'),
+            output_tokens=('output_tokens', 'sum'),
+            cost=('cost', 'sum')
+        ).to_dict(orient='index')
         
         return {
-            'total_requests': total_requests,
-            'total_cost': total_cost,
+            'total_requests': len(df),
+            'total_cost': float(df['cost'].sum()),
             'by_model': by_model
         }
@@ -1,5 +1,5 @@
-def get_sentiment_prompt():
-    return """Classify earnings call presentation sentiment: POSITIVE, NEUTRAL, or NEGATIVE.
+# Kept byte-identical across calls and above 1024 tokens so the provider's prompt cache applies
+_CLASSIFICATION_GUIDE = """Classify earnings call presentation sentiment: POSITIVE, NEUTRAL, or NEGATIVE.
 
 CLASSIFICATION FRAMEWORK:
 
@@ -51,15 +51,62 @@ DECISION RULES:
 5. Numbers always override management spin
 6. Probabilities must sum to 1.0, dominant class ≥0.60
 
-OUTPUT (JSON only):
+REFERENCE EXAMPLES (illustrative excerpts, not from the dataset being classified):
+
+Example 1: "Revenue grew 12% to $4.2 billion, adjusted EPS rose 18%, and we are raising our full-year outlook."
+→ POSITIVE (Path 1 + Path 2): positive 0.82, negative 0.05, neutral 0.13
+
+Example 2: "Net sales declined 9% year-over-year and operating income fell 22%. We now expect full-year revenue at the low end of our previous range."
+→ NEGATIVE (revenue ≥5% decline, operating income ≥10% decline): positive 0.05, negative 0.85, neutral 0.10
+
+Example 3: "We are thrilled to announce FDA acceptance of our filing, with a decision expected in the third quarter, and commercial launch preparations are well underway."
+→ POSITIVE (Path 3, near-term regulatory catalyst): positive 0.72, negative 0.05, neutral 0.23
+
+Example 4: "Third-quarter revenue was a record, up 15%. We are maintaining our fourth-quarter guidance but remain cautious, as order intake has softened and visibility into next year is limited."
+→ NEUTRAL (temporal mismatch): positive 0.25, negative 0.13, neutral 0.62
+
+Example 5: "Our Industrial segment grew 8% while Consumer declined 11%; consolidated revenue was flat."
+→ NEUTRAL (divisional mix, no consolidated direction): positive 0.20, negative 0.15, neutral 0.65
+
+Example 6: "Enrollment in our Phase 2 trial continues and we will share further updates at a future medical meeting."
+→ NEUTRAL (non-financial, no near-term commercial milestone): positive 0.15, negative 0.05, neutral 0.80
+
+Example 7: "Despite weaker results in one region, total revenue increased 7%, EBITDA margin expanded 150 basis points, and we reaffirm our guidance."
+→ POSITIVE (rule 4, Path 1 + Path 2): positive 0.80, negative 0.05, neutral 0.15
+
+Example 8: "We reported a net loss of $45 million compared to net income of $12 million a year ago, although management remains excited about the pipeline."
+→ NEGATIVE (net loss; numbers override spin): positive 0.08, negative 0.78, neutral 0.14
+
+Example 9: "Good morning and thank you for joining. Please refer to our press release for the full results."
+→ NEUTRAL (very brief content): positive 0.10, negative 0.05, neutral 0.85
+
+Example 10: "We delivered our first full year of positive operating profit and reaffirm our target of double-digit growth next year."
+→ POSITIVE (Path 2, profitability milestone + guidance reaffirmed): positive 0.78, negative 0.05, neutral 0.17
+
+"""
+
+SENTIMENT_PROMPT = _CLASSIFICATION_GUIDE + """OUTPUT (JSON only, fields in this order, reasoning in at most two sentences):
 {
-    "reasoning": "Cite key evidence (specific metrics if available, or tone + context if not)",
+    "sentiment": "positive|negative|neutral",
     "positive_prob": 0.0-1.0,
     "negative_prob": 0.0-1.0,
     "neutral_prob": 0.0-1.0,
-    "sentiment": "positive|negative|neutral"
+    "reasoning": "Cite key evidence (specific metrics if available, or tone + context if not)"
 }"""
 
+# Label and probabilities only, for runs where reasoning is not reviewed
+SENTIMENT_PROMPT_LABEL_ONLY = _CLASSIFICATION_GUIDE + """OUTPUT (JSON only, fields in this order):
+{
+    "sentiment": "positive|negative|neutral",
+    "positive_prob": 0.0-1.0,
+    "negative_prob": 0.0-1.0,
+    "neutral_prob": 0.0-1.0
+}"""
+
+
+def get_sentiment_prompt(include_reasoning: bool = False):
+    return SENTIMENT_PROMPT if include_reasoning else SENTIMENT_PROMPT_LABEL_ONLY
+
 
 def get_user_prompt(
     presentation_text: str, company_name: str = "", event_date: str = ""
@@ -5,9 +5,11 @@ With retry logic, timeouts, progress tracking, and incremental saving
 
 import sys
 import pickle
-import json
 import asyncio
+import hashlib
 import os
+import random
+import orjson
 from pathlib import Path
 from typing import List, Dict
 from asyncio import TimeoutError
@@ -15,46 +17,165 @@ from datetime import datetime
 
 sys.path.append(str(Path(__file__).parent.parent))
 
+from aiolimiter import AsyncLimiter
 from dotenv import load_dotenv
+from openai import RateLimitError
 from config.models import get_async_client
 from config.pricing import get_model_pricing
 from sentiment_analysis.prompts.sentiment_prompts import get_sentiment_prompt, get_user_prompt
 from sentiment_analysis.cost_logger import CostLogger
+from sentiment_analysis.cache import ResponseCache
+from sentiment_analysis.sentiment_analyzer import (
+    HEAD_TOKENS, LABEL_ONLY_MAX_TOKENS, MAX_OUTPUT_TOKENS, TAIL_TOKENS,
+    get_encoding, normalize_probs, parse_sentiment_json, truncate_for_budget
+)
+import numpy as np
 import pandas as pd
 
 # Load environment variables
 load_dotenv()
 
+BATCH_ENDPOINT = "/chat/completions"
+BATCH_POLL_SECONDS = 60
+BATCH_ENDED_STATUSES = ('failed', 'expired', 'cancelled')  # Terminal without usable output
+BATCH_DISCOUNT = 0.5  # Batch jobs are billed at half the standard token price
+SHORT_CONTENT_WORDS = 50  # The prompt labels very brief content NEUTRAL, so these skip the API
+
+# Output schema: event metadata followed by one preallocated column per result field
+META_COLUMNS = ['companyid', 'companyname', 'transcriptid', 'event_date', 'headline',
+                'presentation_text', 'total_word_count']
+RESULT_DTYPES = {
+    'sentiment': object,
+    'positive_prob': np.float64,
+    'negative_prob': np.float64,
+    'neutral_prob': np.float64,
+    'reasoning': object,
+    'input_tokens': np.int64,
+    'cached_tokens': np.int64,
+    'output_tokens': np.int64,
+    'total_tokens': np.int64,
+    'cost': np.float64,
+    'success': bool,
+    'attempts': np.int64,
+    'escalated': bool,
+    'cached': bool
+}
+
 
 class ProductionSentimentAnalyzer:
     """Production sentiment analyzer with retries, timeouts, and progress tracking"""
     
-    def __init__(self, model_name="gpt-4.1", timeout=45, max_retries=3):
+    def __init__(self, model_name="gpt-4.1", timeout=45, max_retries=3,
+                 tokens_per_minute=None, requests_per_minute=None, use_cache=True,
+                 cheap_model=None, confidence_threshold=0.65, include_reasoning=False):
         self.client = get_async_client()
+        # No SDK-level retries for completions: 429s must reach _request_with_retry so the shared pause applies
+        self.completions_client = self.client.with_options(max_retries=0)
         self.model = model_name
         self.pricing = get_model_pricing(model_name)
+        
+        # Optional first-pass model; results below confidence_threshold are re-run on model_name
+        self.cheap_model = cheap_model
+        self.cheap_pricing = get_model_pricing(cheap_model) if cheap_model else None
+        self.confidence_threshold = confidence_threshold
+        self._cache_model = f"{cheap_model}>{model_name}@{confidence_threshold}" if cheap_model else model_name
+        
         self.logger = CostLogger()
+        self.cache = ResponseCache() if use_cache else None
+        
+        # Without reasoning the response is only the label and probabilities, so decoding is much shorter
+        self._system_msg = {'role': 'system', 'content': get_sentiment_prompt(include_reasoning)}
+        self.max_output_tokens = MAX_OUTPUT_TOKENS if include_reasoning else LABEL_ONLY_MAX_TOKENS
+        
+        # Tokenizer for pre-call estimates; the prompt framing is counted once
+        self._encoding = get_encoding(model_name)
+        self._prompt_overhead_tokens = self.count_tokens(self._system_msg['content'] + get_user_prompt(''))
         self.timeout = timeout
         self.max_retries = max_retries
         
+        # Optional quota-aware limiters; concurrency alone ignores how long each prompt is
+        self.token_limiter = AsyncLimiter(tokens_per_minute, 60) if tokens_per_minute else None
+        self.request_limiter = AsyncLimiter(requests_per_minute, 60) if requests_per_minute else None
+        
+        # Shared pause: a 429 on any task holds back every task until the retry window passes
+        self._resume = asyncio.Event()
+        self._resume.set()
+        self._paused_until = 0.0
+        self._resume_handle = None
+        
         self.completed_count = 0
         self.failed_count = 0
+        self.short_circuit_count = 0
+        self.resumed_count = 0
+        self.cache_hit_count = 0
+        self.duplicate_count = 0
+        self.escalated_count = 0
         self.total_count = 0
         
     async def analyze_with_retry(self, presentation_text: str, company_name: str = "", 
-                                event_date: str = "", temperature: float = 0.0) -> Dict:
-        """Analyze sentiment with retry logic and timeout"""
+                                event_date: str = "", temperature: float = 0.0,
+                                text_tokens: int = None) -> Dict:
+        """Analyze sentiment with retry logic and timeout, escalating low-confidence cheap-model results"""
+        
+        # A caller passing text_tokens has already trimmed the text with _fit_to_budget
+        if text_tokens is None:
+            presentation_text, text_tokens = self._fit_to_budget(presentation_text)
+        # Azure charges max_tokens against the TPM quota up front, so the limiter does too
+        estimated_tokens = self._prompt_overhead_tokens + min(text_tokens, HEAD_TOKENS + TAIL_TOKENS) + self.max_output_tokens
+        messages = self._messages(presentation_text, company_name, event_date)
+        
+        # Identical request already answered - reuse it without calling the API
+        if self.cache is not None:
+            cache_key = self.cache.make_key(messages, self._cache_model, temperature)
+            cached_result = self.cache.get(cache_key)
+            if cached_result is not None:
+                self.cache_hit_count += 1
+                self.completed_count += 1
+                return cached_result
+        
+        if self.cheap_model is None:
+            result = await self._request_with_retry(messages, self.model, self.pricing,
+                                                    company_name, event_date, temperature, estimated_tokens)
+        else:
+            result = await self._request_with_retry(messages, self.cheap_model, self.cheap_pricing,
+                                                    company_name, event_date, temperature, estimated_tokens)
+            top_prob = max(result['positive_prob'], result['negative_prob'], result['neutral_prob'])
+            if not result['success'] or top_prob < self.confidence_threshold:
+                escalated = await self._request_with_retry(messages, self.model, self.pricing,
+                                                           company_name, event_date, temperature, estimated_tokens)
+                # Both calls are billed, so the escalated result carries the combined usage
+                for key in ('input_tokens', 'cached_tokens', 'output_tokens', 'total_tokens', 'attempts'):
+                    escalated[key] += result[key]
+                escalated['cost'] = round(escalated['cost'] + result['cost'], 6)
+                escalated['escalated'] = True
+                result = escalated
+                self.escalated_count += 1
+        
+        if not result['success']:
+            self.failed_count += 1
+            return result
+        
+        self.completed_count += 1
+        if self.cache is not None:
+            self.cache.set(cache_key, result)
+        
+        return result
+    
+    async def _request_with_retry(self, messages: List[Dict], model: str, pricing, company_name: str,
+                                  event_date: str, temperature: float, estimated_tokens: int) -> Dict:
+        """Call one model with retries and timeout; failures are returned as error results"""
         
         for attempt in range(1, self.max_retries + 1):
             try:
+                await self._resume.wait()
+                await self._acquire_rate_limit(estimated_tokens)
+                
                 response = await asyncio.wait_for(
-                    self.client.chat.completions.create(
-                        model=self.model,
+                    self.completions_client.chat.completions.create(
+                        model=model,
                         temperature=temperature,
-                        messages=[
-                            {'role': 'system', 'content': get_sentiment_prompt()},
-                            {'role': 'user', 'content': get_user_prompt(presentation_text, company_name, event_date)}
-                        ],
+                        messages=messages,
+                        max_tokens=self.max_output_tokens,
                         response_format={"type": "json_object"}
                     ),
                     timeout=self.timeout
@@ -64,13 +185,14 @@ class ProductionSentimentAnalyzer:
                 usage = response.usage
                 input_tokens = usage.prompt_tokens
                 output_tokens = usage.completion_tokens
+                cached_tokens = getattr(usage.prompt_tokens_details, 'cached_tokens', None) or 0
                 
-                # Calculate cost
-                cost_breakdown = self.pricing.calculate_cost(input_tokens, output_tokens)
+                # Calculate cost (cached prompt prefix is billed at the cached-input rate)
+                cost_breakdown = pricing.calculate_cost(input_tokens, output_tokens, cached_tokens)
                 
                 # Log the request
                 self.logger.log_request(
-                    model=self.model,
+                    model=model,
                     input_tokens=input_tokens,
                     output_tokens=output_tokens,
                     cost=cost_breakdown['total_cost'],
@@ -78,73 +200,141 @@ class ProductionSentimentAnalyzer:
                         'company': company_name,
                         'event_date': event_date,
                         'attempt': attempt
-                    }
+                    },
+                    cached_tokens=cached_tokens
                 )
                 
-                # Parse result
-                try:
-                    result = json.loads(response.choices[0].message.content)
-                except (json.JSONDecodeError, AttributeError, TypeError):
-                    result = {}
-                
-                # Validate sentiment
-                sentiment = result.get('sentiment', 'neutral').lower()
-                if sentiment not in ['positive', 'negative', 'neutral']:
-                    sentiment = 'neutral'
-                
-                # Normalize probabilities
-                pos_prob = float(result.get('positive_prob', 0.0))
-                neg_prob = float(result.get('negative_prob', 0.0))
-                neu_prob = float(result.get('neutral_prob', 0.0))
-                
-                total_prob = pos_prob + neg_prob + neu_prob
-                if total_prob > 0:
-                    pos_prob /= total_prob
-                    neg_prob /= total_prob
-                    neu_prob /= total_prob
-                else:
-                    neu_prob = 1.0
-                
-                self.completed_count += 1
-                
-                return {
-                    'sentiment': sentiment,
-                    'positive_prob': round(pos_prob, 3),
-                    'negative_prob': round(neg_prob, 3),
-                    'neutral_prob': round(neu_prob, 3),
-                    'reasoning': result.get('reasoning', ''),
-                    'input_tokens': input_tokens,
-                    'output_tokens': output_tokens,
-                    'total_tokens': input_tokens + output_tokens,
-                    'cost': round(cost_breakdown['total_cost'], 6),
-                    'success': True,
-                    'attempts': attempt
-                }
+                return self._parse_result(
+                    response.choices[0].message.content,
+                    input_tokens, output_tokens, cached_tokens, cost_breakdown['total_cost'], attempt
+                )
                 
             except TimeoutError:
                 if attempt < self.max_retries:
                     print(f"   ⏱️  Timeout on attempt {attempt}/{self.max_retries} for {company_name[:40]} - retrying...")
-                    await asyncio.sleep(2 ** attempt)  # Exponential backoff
+                    await asyncio.sleep(self._backoff(attempt))
                     continue
                 else:
                     print(f"   ❌ Failed after {self.max_retries} attempts (timeout): {company_name[:40]}")
-                    self.failed_count += 1
                     return self._error_result(f'Timeout after {self.max_retries} attempts', attempt)
                     
+            except RateLimitError as e:
+                if attempt < self.max_retries:
+                    delay = self._retry_after(e) or self._backoff(attempt)
+                    print(f"   🚦 Rate limited on attempt {attempt}/{self.max_retries} for {company_name[:40]} - pausing all requests for {delay:.1f}s...")
+                    self._pause_requests(delay)
+                    continue
+                else:
+                    print(f"   ❌ Failed after {self.max_retries} attempts (rate limited): {company_name[:40]}")
+                    return self._error_result(f'Rate limited after {self.max_retries} attempts', attempt)
+                    
             except Exception as e:
                 if attempt < self.max_retries:
                     print(f"   ⚠️  Error on attempt {attempt}/{self.max_retries} for {company_name[:40]}: {str(e)[:50]} - retrying...")
-                    await asyncio.sleep(2 ** attempt)
+                    await asyncio.sleep(self._backoff(attempt))
                     continue
                 else:
                     print(f"   ❌ Failed after {self.max_retries} attempts: {company_name[:40]} - {str(e)[:50]}")
-                    self.failed_count += 1
                     return self._error_result(str(e), attempt)
         
         # Should never reach here
-        self.failed_count += 1
         return self._error_result('Max retries exceeded', self.max_retries)
     
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        """Exponential backoff with jitter so concurrent retries do not line up"""
+        return (2 ** attempt) * random.uniform(0.5, 1.5)
+    
+    def _pause_requests(self, delay: float):
+        """Hold back new requests from all tasks for delay seconds (extends, never shortens, a pause)"""
+        loop = asyncio.get_running_loop()
+        resume_at = loop.time() + delay
+        if resume_at <= self._paused_until:
+            return
+        self._paused_until = resume_at
+        self._resume.clear()
+        if self._resume_handle is not None:
+            self._resume_handle.cancel()
+        self._resume_handle = loop.call_later(delay, self._resume.set)
+    
+    async def _acquire_rate_limit(self, estimated_tokens: int):
+        """Wait for request and token budget before sending a request"""
+        if self.request_limiter is not None:
+            await self.request_limiter.acquire()
+        if self.token_limiter is not None:
+            await self.token_limiter.acquire(min(estimated_tokens, self.token_limiter.max_rate))
+    
+    def count_tokens(self, text: str) -> int:
+        return len(self._encoding.encode(text, disallowed_special=()))
+    
+    def _fit_to_budget(self, text: str):
+        """Encode a presentation once; returns it trimmed to the token budget and its full token count"""
+        tokens = self._encoding.encode(text, disallowed_special=())
+        return truncate_for_budget(text, self.model, tokens=tokens), len(tokens)
+    
+    def _add_budget_columns(self, df: pd.DataFrame):
+        """Add budget_text and text_tokens so each presentation is tokenized only once per run"""
+        fitted = [self._fit_to_budget(text) for text in df['presentation_text']]
+        df['budget_text'] = [text for text, _ in fitted]
+        df['text_tokens'] = [text_tokens for _, text_tokens in fitted]
+    
+    def _estimate_cost(self, text_tokens, pricing, discount: float = 1.0) -> Dict:
+        """A-priori input tokens and upper-bound cost for sending these presentations once"""
+        text_tokens = np.asarray(text_tokens, dtype=np.int64)
+        input_tokens = int((np.minimum(text_tokens, HEAD_TOKENS + TAIL_TOKENS) + self._prompt_overhead_tokens).sum())
+        output_tokens = self.max_output_tokens * len(text_tokens)
+        cost = pricing.calculate_cost(input_tokens, output_tokens)['total_cost'] * discount
+        return {'requests': len(text_tokens), 'input_tokens': input_tokens, 'cost': cost}
+    
+    @staticmethod
+    def _retry_after(error: RateLimitError):
+        """Seconds to wait according to the 429 response headers, if provided"""
+        headers = error.response.headers if error.response is not None else {}
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        if headers.get('retry-after'):
+            try:
+                return float(headers['retry-after'])
+            except ValueError:
+                return None
+        return None
+    
+    def _messages(self, presentation_text: str, company_name: str, event_date: str) -> List[Dict]:
+        return [
+            self._system_msg,
+            {'role': 'user', 'content': get_user_prompt(presentation_text, company_name, event_date)}
+        ]
+    
+    def _parse_result(self, content: str, input_tokens: int, output_tokens: int,
+                      cached_tokens: int, cost: float, attempts: int) -> Dict:
+        """Validate the model's JSON output and build the result structure"""
+        result = parse_sentiment_json(content)
+        
+        # Validate sentiment
+        sentiment = result.get('sentiment', 'neutral').lower()
+        if sentiment not in ['positive', 'negative', 'neutral']:
+            sentiment = 'neutral'
+        
+        # Normalize probabilities
+        pos_prob, neg_prob, neu_prob = normalize_probs(result)
+        
+        return {
+            'sentiment': sentiment,
+            'positive_prob': pos_prob,
+            'negative_prob': neg_prob,
+            'neutral_prob': neu_prob,
+            'reasoning': result.get('reasoning', ''),
+            'input_tokens': input_tokens,
+            'cached_tokens': cached_tokens,
+            'output_tokens': output_tokens,
+            'total_tokens': input_tokens + output_tokens,
+            'cost': round(cost, 6),
+            'success': True,
+            'attempts': attempts,
+            'escalated': False,
+            'cached': False
+        }
+    
     def _error_result(self, error_msg: str, attempts: int) -> Dict:
         """Return error result structure"""
         return {
@@ -154,13 +344,97 @@ class ProductionSentimentAnalyzer:
             'neutral_prob': 1.0,
             'reasoning': f'Error: {error_msg}',
             'input_tokens': 0,
+            'cached_tokens': 0,
             'output_tokens': 0,
             'total_tokens': 0,
             'cost': 0.0,
             'success': False,
-            'attempts': attempts
+            'attempts': attempts,
+            'escalated': False,
+            'cached': False
         }
     
+    def _short_content_result(self) -> Dict:
+        """Predetermined result for presentations below SHORT_CONTENT_WORDS"""
+        return {
+            'sentiment': 'neutral',
+            'positive_prob': 0.0,
+            'negative_prob': 0.0,
+            'neutral_prob': 1.0,
+            'reasoning': f'Short content rule (<{SHORT_CONTENT_WORDS} words)',
+            'input_tokens': 0,
+            'cached_tokens': 0,
+            'output_tokens': 0,
+            'total_tokens': 0,
+            'cost': 0.0,
+            'success': True,
+            'attempts': 0,
+            'escalated': False,
+            'cached': False
+        }
+    
+    def _allocate_results(self, n: int) -> Dict[str, np.ndarray]:
+        """One array per result field, filled by row position as results arrive"""
+        return {name: np.empty(n, dtype=dtype) for name, dtype in RESULT_DTYPES.items()}
+    
+    @staticmethod
+    def _store_result(columns: Dict[str, np.ndarray], pos: int, result: Dict):
+        for name, column in columns.items():
+            column[pos] = result[name]
+    
+    @staticmethod
+    def _build_results(df: pd.DataFrame, columns: Dict[str, np.ndarray]) -> pd.DataFrame:
+        """Combine event metadata with the sentiment result columns"""
+        df_results = df.reindex(columns=META_COLUMNS).reset_index(drop=True)
+        df_results['headline'] = df_results['headline'].fillna('')
+        for name, column in columns.items():
+            df_results[name] = column
+        return df_results
+    
+    @staticmethod
+    def _duplicate_result(result: Dict) -> Dict:
+        """Copy of another event's result; no API usage is attributed to the duplicate"""
+        return {**result, 'input_tokens': 0, 'cached_tokens': 0, 'output_tokens': 0,
+                'total_tokens': 0, 'cost': 0.0, 'attempts': 0}
+    
+    @staticmethod
+    def _text_hashes(df: pd.DataFrame) -> pd.Series:
+        """Hash of the normalized presentation text, used to send each distinct text once"""
+        return df['presentation_text'].str.strip().str.lower().map(
+            lambda text: hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+        )
+    
+    def _load_dataset(self, data_path: str):
+        print(f"📂 Loading dataset from: {data_path}")
+        if not Path(data_path).exists():
+            print(f"❌ Error: File not found: {data_path}")
+            return None
+        
+        with open(data_path, 'rb') as f:
+            df = pickle.load(f)
+        
+        self.total_count = len(df)
+        print(f"✅ Loaded {self.total_count} events\n")
+        return df
+    
+    def _load_progress(self, progress_file: Path) -> Dict:
+        """Successful results from a previous interrupted run, keyed by transcriptid"""
+        if not progress_file.exists():
+            return {}
+        
+        done = {}
+        for line in progress_file.read_bytes().splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                continue  # Partial line from a crash mid-write
+            if record.get('success'):
+                record.setdefault('cached', False)  # Logs written before the field existed
+                done[record['transcriptid']] = record
+        return done
+    
     async def analyze_full_dataset(self, data_path: str, output_path: str = None, 
                                    batch_size: int = 50, save_every: int = 100):
         """
@@ -169,125 +443,151 @@ class ProductionSentimentAnalyzer:
         Args:
             data_path: Path to aggregated dataset (pkl file)
             output_path: Where to save results (default: data/results/sentiment_results.pkl)
-            batch_size: Number of concurrent requests (default: 50)
-            save_every: Save progress every N events (default: 100)
+            batch_size: Maximum number of requests in flight (default: 50)
+            save_every: Flush the progress log every N events (default: 100)
+        
+        Each result is appended to <output>.jsonl as it arrives; rerunning after a crash
+        skips events that already succeeded there.
         """
         
         print(f"\nSENTIMENT ANALYSIS - FULL DATASET")
         print(f"Model: {self.model} | Timeout: {self.timeout}s | Max retries: {self.max_retries}")
+        if self.cheap_model:
+            print(f"First pass: {self.cheap_model} | Escalate below {self.confidence_threshold:.2f} confidence")
         print(f"Batch size: {batch_size} concurrent | Auto-save every: {save_every} events\n")
         
         # Load dataset
-        print(f"📂 Loading dataset from: {data_path}")
-        data_file = Path(data_path)
-        if not data_file.exists():
-            print(f"❌ Error: File not found: {data_path}")
+        df = self._load_dataset(data_path)
+        if df is None:
             return
         
-        with open(data_path, 'rb') as f:
-            df = pickle.load(f)
-        
-        self.total_count = len(df)
-        print(f"✅ Loaded {self.total_count} events\n")
-        
         # Setup output path
         if output_path is None:
             output_path = "data/results/sentiment_results.pkl"
         output_file = Path(output_path)
         output_file.parent.mkdir(parents=True, exist_ok=True)
+        progress_file = output_file.with_suffix('.jsonl')
+        
+        # Resume from the progress log of an interrupted run
+        done = self._load_progress(progress_file)
+        if done:
+            print(f"♻️  Resuming: {len(done)} events already analyzed in {progress_file}")
         
         # Track start time
         start_time = datetime.now()
         
-        # Process in batches
-        all_results = []
+        # Keep exactly batch_size requests in flight; a slow request no longer holds back the next batch
+        semaphore = asyncio.Semaphore(batch_size)
         
-        for batch_start in range(0, self.total_count, batch_size):
-            batch_end = min(batch_start + batch_size, self.total_count)
-            batch_df = df.iloc[batch_start:batch_end]
-            
-            print(f"\n📊 Processing batch {batch_start + 1}-{batch_end} of {self.total_count}")
-            print(f"   Progress: {batch_start}/{self.total_count} ({batch_start/self.total_count*100:.1f}%)")
-            print(f"   Remaining: {self.total_count - batch_start} events")
-            
-            # Create tasks for this batch
-            tasks = []
-            for idx, row in batch_df.iterrows():
-                task = self.analyze_with_retry(
-                    presentation_text=row['presentation_text'],
-                    company_name=row['companyname'],
-                    event_date=row['event_date']
+        async def bounded(pos, presentation_text, company_name, event_date, text_tokens):
+            async with semaphore:
+                result = await self.analyze_with_retry(
+                    presentation_text=presentation_text,
+                    company_name=company_name,
+                    event_date=event_date,
+                    text_tokens=text_tokens
                 )
-                tasks.append((idx, row, task))
-            
-            # Execute batch
-            batch_results = await asyncio.gather(*[task for _, _, task in tasks])
-            
-            # Process results and add metadata
-            for i, (idx, row, _) in enumerate(tasks):
-                result_dict = {
-                    'companyid': row['companyid'],
-                    'companyname': row['companyname'],
-                    'transcriptid': row['transcriptid'],
-                    'event_date': row['event_date'],
-                    'headline': row.get('headline', ''),
-                    'presentation_text': row['presentation_text'],
-                    'total_word_count': row['total_word_count'],
-                    
-                    # Sentiment results
-                    'sentiment': batch_results[i]['sentiment'],
-                    'positive_prob': batch_results[i]['positive_prob'],
-                    'negative_prob': batch_results[i]['negative_prob'],
-                    'neutral_prob': batch_results[i]['neutral_prob'],
-                    'reasoning': batch_results[i]['reasoning'],
-                    
-                    # API usage
-                    'input_tokens': batch_results[i]['input_tokens'],
-                    'output_tokens': batch_results[i]['output_tokens'],
-                    'total_tokens': batch_results[i]['total_tokens'],
-                    'cost': batch_results[i]['cost'],
-                    'success': batch_results[i]['success'],
-                    'attempts': batch_results[i]['attempts']
-                }
-                all_results.append(result_dict)
-            
-            # Print batch summary
-            batch_success = sum(1 for r in batch_results if r['success'])
-            batch_failed = len(batch_results) - batch_success
-            print(f"   ✅ Completed: {batch_success}/{len(batch_results)}")
-            if batch_failed > 0:
-                print(f"   ❌ Failed: {batch_failed}/{len(batch_results)}")
-            
-            # Calculate running stats
-            elapsed = (datetime.now() - start_time).total_seconds()
-            events_per_sec = self.completed_count / elapsed if elapsed > 0 else 0
-            remaining_events = self.total_count - (batch_end)
-            eta_seconds = remaining_events / events_per_sec if events_per_sec > 0 else 0
-            
-            print(f"   ⏱️  Speed: {events_per_sec:.2f} events/sec")
-            print(f"   ⏳ ETA: {eta_seconds/60:.1f} minutes")
-            
-            # Incremental save
-            if (batch_end % save_every == 0) or (batch_end == self.total_count):
-                print(f"   💾 Saving progress... ({len(all_results)} events)")
-                df_results = pd.DataFrame(all_results)
-                with open(output_file, 'wb') as f:
-                    pickle.dump(df_results, f)
-                print(f"   ✅ Saved to: {output_file}")
+            return pos, result
+        
+        columns = self._allocate_results(len(df))
+        done_count = 0
+        tasks = []
+        text_hashes = self._text_hashes(df).to_numpy()
+        first_pos_by_hash = {}
+        duplicates_of = {}  # position of the dispatched event -> positions sharing its text
+        pending = []  # positions that will actually be sent
+        for pos, row in enumerate(df[['transcriptid', 'total_word_count']].itertuples(index=False, name='Row')):
+            if row.transcriptid in done:
+                self._store_result(columns, pos, done[row.transcriptid])
+                self.resumed_count += 1
+                done_count += 1
+                continue
+            if row.total_word_count < SHORT_CONTENT_WORDS:
+                self._store_result(columns, pos, self._short_content_result())
+                self.short_circuit_count += 1
+                done_count += 1
+                continue
+            first_pos = first_pos_by_hash.setdefault(text_hashes[pos], pos)
+            if first_pos != pos:
+                duplicates_of.setdefault(first_pos, []).append(pos)
+                self.duplicate_count += 1
+                continue
+            pending.append(pos)
+        
+        # Only the events being sent are tokenized, so a resumed run's estimate covers just the remaining work
+        dispatch = df.iloc[pending].copy()
+        self._add_budget_columns(dispatch)
+        dispatch_rows = dispatch[['budget_text', 'companyname', 'event_date', 'text_tokens']]
+        for pos, row in zip(pending, dispatch_rows.itertuples(index=False, name='Row')):
+            tasks.append(asyncio.create_task(
+                bounded(pos, row.budget_text, row.companyname, row.event_date, row.text_tokens)
+            ))
+        
+        if self.short_circuit_count > 0:
+            print(f"⏭️  Skipped API for {self.short_circuit_count} events under {SHORT_CONTENT_WORDS} words (labelled NEUTRAL)")
+        if self.duplicate_count > 0:
+            print(f"🔁 Skipped API for {self.duplicate_count} events whose text duplicates another event")
+        
+        # Tasks only start at the first await below, so this prints before any request is sent
+        estimate = self._estimate_cost(dispatch['text_tokens'], self.cheap_pricing or self.pricing)
+        escalation_note = " before escalations" if self.cheap_model else ""
+        print(f"💰 Estimate: {estimate['requests']} requests | ~{estimate['input_tokens']:,} input tokens | up to ${estimate['cost']:.2f}{escalation_note}")
+        
+        transcript_ids = df['transcriptid'].to_numpy()
+        
+        # Collect results as they complete, appending each one to the progress log.
+        # Duplicate fan-out can advance done_count by several at once, so report and
+        # flush on crossing a threshold rather than landing exactly on a multiple.
+        next_progress = batch_size
+        next_flush = save_every
+        with open(progress_file, 'ab') as progress_log:
+            for next_done in asyncio.as_completed(tasks):
+                pos, result = await next_done
+                fanned_out = [(pos, result)] + [
+                    (dup_pos, self._duplicate_result(result)) for dup_pos in duplicates_of.get(pos, [])
+                ]
+                for event_pos, event_result in fanned_out:
+                    self._store_result(columns, event_pos, event_result)
+                    progress_log.write(orjson.dumps(
+                        {'transcriptid': transcript_ids[event_pos], **event_result}, option=orjson.OPT_SERIALIZE_NUMPY
+                    ) + b'\n')
+                done_count += len(fanned_out)
+                if not result['success']:
+                    self.failed_count += len(fanned_out) - 1
+                
+                if done_count >= next_progress or done_count == self.total_count:
+                    while next_progress <= done_count:
+                        next_progress += batch_size
+                    elapsed = (datetime.now() - start_time).total_seconds()
+                    events_per_sec = self.completed_count / elapsed if elapsed > 0 else 0
+                    remaining_events = self.total_count - done_count
+                    eta_seconds = remaining_events / events_per_sec if events_per_sec > 0 else 0
+                
+                    print(f"\n📊 Progress: {done_count}/{self.total_count} ({done_count/self.total_count*100:.1f}%)")
+                    print(f"   ✅ Completed: {self.completed_count} | ❌ Failed: {self.failed_count}")
+                    print(f"   ⏱️  Speed: {events_per_sec:.2f} events/sec")
+                    print(f"   ⏳ ETA: {eta_seconds/60:.1f} minutes")
+                
+                # Incremental save
+                if done_count >= next_flush:
+                    progress_log.flush()
+                    while next_flush <= done_count:
+                        next_flush += save_every
         
         # Final statistics
         end_time = datetime.now()
         total_duration = (end_time - start_time).total_seconds()
         
         print(f"\nANALYSIS COMPLETE")
-        print(f"Total: {self.total_count} | Success: {self.completed_count} ({self.completed_count/self.total_count*100:.1f}%) | Failed: {self.failed_count}")
+        success_count = int(columns['success'].sum())
+        print(f"Total: {self.total_count} | Success: {success_count} ({success_count/self.total_count*100:.1f}%) | Failed: {self.failed_count} | Short-circuited: {self.short_circuit_count} | Resumed: {self.resumed_count} | Cache hits: {self.cache_hit_count} | Duplicates: {self.duplicate_count} | Escalated: {self.escalated_count}")
         print(f"Time: {total_duration/60:.1f} min | Speed: {self.completed_count/total_duration:.2f} events/sec\n")
         
         # Cost summary
         self.logger.print_session_summary()
         
         # Distribution of sentiments
-        df_results = pd.DataFrame(all_results)
+        df_results = self._build_results(df, columns)
         print(f"\nSENTIMENT DISTRIBUTION")
         sentiment_counts = df_results['sentiment'].value_counts()
         for sentiment, count in sentiment_counts.items():
@@ -299,6 +599,219 @@ class ProductionSentimentAnalyzer:
             pickle.dump(df_results, f)
         print(f"✅ Results saved successfully")
         
+        # Keep the log while there are failures so a rerun only retries those
+        if self.failed_count == 0:
+            progress_file.unlink(missing_ok=True)
+        else:
+            print(f"⚠️  {self.failed_count} failed events remain in {progress_file} - rerun to retry them")
+        
+        return df_results
+
+    
+    async def submit_batch_job(self, df: pd.DataFrame, batch_input_path: Path):
+        """Write one chat completion request per distinct text to JSONL and submit it as a batch job (df needs text_hash, budget_text)"""
+        
+        with open(batch_input_path, 'wb') as f:
+            for row in df[['text_hash', 'budget_text', 'companyname', 'event_date']].itertuples(index=False, name='Row'):
+                request = {
+                    'custom_id': row.text_hash,
+                    'method': 'POST',
+                    'url': BATCH_ENDPOINT,
+                    'body': {
+                        'model': self.model,
+                        'temperature': 0.0,
+                        'messages': self._messages(row.budget_text, row.companyname, str(row.event_date)),
+                        'max_tokens': self.max_output_tokens,
+                        'response_format': {'type': 'json_object'}
+                    }
+                }
+                f.write(orjson.dumps(request) + b'\n')
+        
+        with open(batch_input_path, 'rb') as f:
+            batch_file = await self.client.files.create(file=f, purpose="batch")
+        
+        return await self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h"
+        )
+    
+    async def run_batch_job(self, df: pd.DataFrame, batch_id_file: Path, batch_input_path: Path):
+        """Submit (or resume) a batch job for df and return its results by custom_id, or None if the job failed"""
+        
+        # The batch id is kept next to the output so a restarted run resumes polling instead of paying again
+        batch = None
+        if batch_id_file.exists():
+            batch = await self.client.batches.retrieve(batch_id_file.read_text().strip())
+            if batch.status in BATCH_ENDED_STATUSES:
+                print(f"⚠️  Previous batch job {batch.id} ended with status: {batch.status} - submitting a new one")
+                batch = None
+            else:
+                print(f"🔁 Resuming batch job: {batch.id} (status: {batch.status})")
+        if batch is None:
+            batch = await self.submit_batch_job(df, batch_input_path)
+            batch_id_file.write_text(batch.id)
+            print(f"📤 Submitted batch job: {batch.id}")
+        
+        while batch.status not in ('completed', *BATCH_ENDED_STATUSES):
+            await asyncio.sleep(BATCH_POLL_SECONDS)
+            batch = await self.client.batches.retrieve(batch.id)
+            counts = batch.request_counts
+            if counts is not None:
+                print(f"   ⏳ Status: {batch.status} | Completed: {counts.completed}/{counts.total} | Failed: {counts.failed}")
+            else:
+                print(f"   ⏳ Status: {batch.status}")
+        
+        if batch.status != 'completed' or batch.output_file_id is None:
+            print(f"❌ Batch job {batch.id} ended with status: {batch.status}")
+            batch_id_file.unlink(missing_ok=True)
+            return None
+        
+        # Collect results by custom_id
+        output = await self.client.files.content(batch.output_file_id)
+        results_by_id = {}
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            item = orjson.loads(line)
+            response = item.get('response') or {}
+            if response.get('status_code') != 200:
+                error = item.get('error') or response.get('body', {}).get('error', 'Unknown error')
+                results_by_id[item['custom_id']] = self._error_result(str(error), 1)
+                continue
+            
+            body = response['body']
+            usage = body['usage']
+            input_tokens = usage['prompt_tokens']
+            output_tokens = usage['completion_tokens']
+            cached_tokens = (usage.get('prompt_tokens_details') or {}).get('cached_tokens', 0)
+            cost = self.pricing.calculate_cost(input_tokens, output_tokens, cached_tokens)['total_cost'] * BATCH_DISCOUNT
+            
+            self.logger.log_request(
+                model=self.model,
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+                cost=cost,
+                metadata={'batch_id': batch.id, 'custom_id': item['custom_id']},
+                cached_tokens=cached_tokens
+            )
+            
+            try:
+                results_by_id[item['custom_id']] = self._parse_result(
+                    body['choices'][0]['message']['content'], input_tokens, output_tokens, cached_tokens, cost, 1
+                )
+            except Exception as e:
+                results_by_id[item['custom_id']] = self._error_result(str(e), 1)
+        
+        return results_by_id
+    
+    async def analyze_full_dataset_batch(self, data_path: str, output_path: str = None):
+        """
+        Analyze full dataset through the Batch API (discounted, no real-time guarantee)
+        
+        Args:
+            data_path: Path to aggregated dataset (pkl file)
+            output_path: Where to save results (default: data/results/sentiment_results.pkl)
+        """
+        
+        print(f"\nSENTIMENT ANALYSIS - FULL DATASET (BATCH API)")
+        print(f"Model: {self.model} | Completion window: 24h | Poll every: {BATCH_POLL_SECONDS}s\n")
+        if self.cheap_model:
+            print(f"ℹ️  Batch jobs run every event on {self.model}; the {self.cheap_model} first pass applies to the concurrent path only\n")
+        
+        df = self._load_dataset(data_path)
+        if df is None:
+            return
+        
+        if output_path is None:
+            output_path = "data/results/sentiment_results.pkl"
+        output_file = Path(output_path)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        
+        # Short content is labelled NEUTRAL locally, exactly as in the concurrent path
+        short = (df['total_word_count'] < SHORT_CONTENT_WORDS).to_numpy()
+        self.short_circuit_count = int(short.sum())
+        if self.short_circuit_count > 0:
+            print(f"⏭️  Skipped API for {self.short_circuit_count} events under {SHORT_CONTENT_WORDS} words (labelled NEUTRAL)")
+        
+        # Each distinct text is sent once; duplicates copy its result as in the concurrent path
+        text_hashes = self._text_hashes(df).to_numpy()
+        first_pos_by_hash = {}
+        for pos in np.flatnonzero(~short):
+            first_pos_by_hash.setdefault(text_hashes[pos], pos)
+        self.duplicate_count = int((~short).sum()) - len(first_pos_by_hash)
+        if self.duplicate_count > 0:
+            print(f"🔁 Skipped API for {self.duplicate_count} events whose text duplicates another event")
+        dispatch = df.iloc[list(first_pos_by_hash.values())].copy()
+        dispatch['text_hash'] = list(first_pos_by_hash.keys())
+        
+        self._add_budget_columns(dispatch)
+        
+        # Texts already answered by either path are reused from the response cache, not paid for again
+        results_by_id = {}
+        if self.cache is not None:
+            dispatch['cache_key'] = [
+                self.cache.make_key(self._messages(row.budget_text, row.companyname, str(row.event_date)), self.model, 0.0)
+                for row in dispatch[['budget_text', 'companyname', 'event_date']].itertuples(index=False, name='Row')
+            ]
+            for text_hash, cache_key in zip(dispatch['text_hash'], dispatch['cache_key']):
+                cached_result = self.cache.get(cache_key)
+                if cached_result is not None:
+                    results_by_id[text_hash] = cached_result
+            self.cache_hit_count = len(results_by_id)
+            if self.cache_hit_count > 0:
+                print(f"♻️  Reusing {self.cache_hit_count} cached results")
+            dispatch = dispatch[~dispatch['text_hash'].isin(list(results_by_id))]
+        
+        estimate = self._estimate_cost(dispatch['text_tokens'], self.pricing, BATCH_DISCOUNT)
+        print(f"💰 Estimate: {estimate['requests']} requests | ~{estimate['input_tokens']:,} input tokens | up to ${estimate['cost']:.2f}")
+        
+        start_time = datetime.now()
+        
+        # The batch id is kept next to the output so a restarted run resumes polling instead of paying again
+        batch_id_file = output_file.with_suffix('.batch_id')
+        if len(dispatch) > 0:
+            batch_results = await self.run_batch_job(dispatch, batch_id_file, output_file.with_suffix('.batch_input.jsonl'))
+            if batch_results is None:
+                return
+            results_by_id.update(batch_results)
+            if self.cache is not None:
+                for text_hash, cache_key in zip(dispatch['text_hash'], dispatch['cache_key']):
+                    result = batch_results.get(text_hash)
+                    if result is not None and result['success']:
+                        self.cache.set(cache_key, result)
+        
+        # Merge back into the same schema as the concurrent run
+        columns = self._allocate_results(len(df))
+        for pos in range(len(df)):
+            if short[pos]:
+                self._store_result(columns, pos, self._short_content_result())
+                continue
+            result = results_by_id.get(text_hashes[pos])
+            if result is None:
+                result = self._error_result('Missing from batch output', 1)
+            elif first_pos_by_hash[text_hashes[pos]] != pos:
+                result = self._duplicate_result(result)
+            if result['success']:
+                self.completed_count += 1
+            else:
+                self.failed_count += 1
+            self._store_result(columns, pos, result)
+        
+        total_duration = (datetime.now() - start_time).total_seconds()
+        print(f"\nANALYSIS COMPLETE")
+        print(f"Total: {self.total_count} | Success: {self.completed_count} | Failed: {self.failed_count} | Short-circuited: {self.short_circuit_count} | Cache hits: {self.cache_hit_count} | Duplicates: {self.duplicate_count}")
+        print(f"Time: {total_duration/60:.1f} min\n")
+        
+        self.logger.print_session_summary()
+        
+        df_results = self._build_results(df, columns)
+        print(f"💾 Final save to: {output_file}")
+        with open(output_file, 'wb') as f:
+            pickle.dump(df_results, f)
+        print(f"✅ Results saved successfully")
+        batch_id_file.unlink(missing_ok=True)
+        
         return df_results
 
 
@@ -313,22 +826,37 @@ async def main():
     MAX_RETRIES = 3
     BATCH_SIZE = 50  # concurrent requests
     SAVE_EVERY = 100  # save progress every N events
+    TOKENS_PER_MINUTE = int(os.getenv("TOKENS_PER_MINUTE", "0")) or None  # deployment TPM quota
+    REQUESTS_PER_MINUTE = int(os.getenv("REQUESTS_PER_MINUTE", "0")) or None  # deployment RPM quota
+    USE_BATCH_API = os.getenv("USE_BATCH_API", "false").lower() == "true"
+    CHEAP_MODEL = os.getenv("CHEAP_MODEL", "gpt-4.1-mini") or None  # first pass; empty disables
+    INCLUDE_REASONING = os.getenv("INCLUDE_REASONING", "false").lower() == "true"
     
     # Create analyzer
     print(f"Using model: {MODEL}")
     analyzer = ProductionSentimentAnalyzer(
         model_name=MODEL,
         timeout=TIMEOUT,
-        max_retries=MAX_RETRIES
+        max_retries=MAX_RETRIES,
+        tokens_per_minute=TOKENS_PER_MINUTE,
+        requests_per_minute=REQUESTS_PER_MINUTE,
+        cheap_model=CHEAP_MODEL,
+        include_reasoning=INCLUDE_REASONING
     )
     
     # Run analysis
-    results = await analyzer.analyze_full_dataset(
-        data_path=DATA_PATH,
-        output_path=OUTPUT_PATH,
-        batch_size=BATCH_SIZE,
-        save_every=SAVE_EVERY
-    )
+    if USE_BATCH_API:
+        results = await analyzer.analyze_full_dataset_batch(
+            data_path=DATA_PATH,
+            output_path=OUTPUT_PATH
+        )
+    else:
+        results = await analyzer.analyze_full_dataset(
+            data_path=DATA_PATH,
+            output_path=OUTPUT_PATH,
+            batch_size=BATCH_SIZE,
+            save_every=SAVE_EVERY
+        )
     
     return results
 
@@ -1,7 +1,7 @@
 import sys
-import pickle
-import json
 import asyncio
+import re
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Dict
 
@@ -11,28 +11,117 @@ from config.models import get_async_client
 from config.pricing import get_model_pricing
 from sentiment_analysis.prompts.sentiment_prompts import get_sentiment_prompt, get_user_prompt
 from sentiment_analysis.cost_logger import CostLogger
+from sentiment_analysis.cache import ResponseCache
+from labeling.label_store import load_labels
+import numpy as np
 import pandas as pd
+import orjson
+import tiktoken
 from datetime import datetime
 
+HEAD_TOKENS = 3000  # Opening remarks and headline results
+TAIL_TOKENS = 1000  # Guidance and outlook usually close the presentation
+TRUNCATION_MARKER = "\n...[omitted]...\n"
+PROB_KEYS = ('positive_prob', 'negative_prob', 'neutral_prob')
+MAX_OUTPUT_TOKENS = 150  # Label and probabilities come first, so a cut-off only loses reasoning
+LABEL_ONLY_MAX_TOKENS = 60  # {"sentiment": ..., three probabilities} without reasoning
+
+# Field extractors for responses cut off at MAX_OUTPUT_TOKENS
+SALVAGE_PATTERNS = {
+    'sentiment': re.compile(r'"sentiment"\s*:\s*"(\w+)"'),
+    'positive_prob': re.compile(r'"positive_prob"\s*:\s*([0-9.]+)\s*[,}]'),
+    'negative_prob': re.compile(r'"negative_prob"\s*:\s*([0-9.]+)\s*[,}]'),
+    'neutral_prob': re.compile(r'"neutral_prob"\s*:\s*([0-9.]+)\s*[,}]'),
+    'reasoning': re.compile(r'"reasoning"\s*:\s*"((?:[^"\\]|\\.)*)')
+}
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def truncate_for_budget(text: str, model: str, head_tokens: int = HEAD_TOKENS,
+                        tail_tokens: int = TAIL_TOKENS, tokens: List[int] = None) -> str:
+    """Keep only the first head_tokens and last tail_tokens of long presentations (pass tokens if already encoded)"""
+    encoding = get_encoding(model)
+    if tokens is None:
+        tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= head_tokens + tail_tokens:
+        return text
+    return encoding.decode(tokens[:head_tokens]) + TRUNCATION_MARKER + encoding.decode(tokens[-tail_tokens:])
+
+
+def parse_sentiment_json(content: str) -> Dict:
+    """Parse the model's JSON output, recovering the leading fields if it was truncated"""
+    if not isinstance(content, str):
+        return {}
+    try:
+        return orjson.loads(content)
+    except orjson.JSONDecodeError:
+        pass
+    
+    result = {}
+    for field, pattern in SALVAGE_PATTERNS.items():
+        match = pattern.search(content)
+        if match is None:
+            continue
+        value = match.group(1)
+        if field == 'reasoning':
+            result[field] = value.replace('\\"', '"')
+        elif field == 'sentiment':
+            result[field] = value
+        else:
+            try:
+                result[field] = float(value)
+            except ValueError:
+                continue
+    return result
+
+
+def normalize_probs(result: Dict) -> List[float]:
+    """Model probabilities rescaled to sum to 1 and rounded; all-neutral when none are usable"""
+    probs = np.asarray([result.get(key, 0.0) for key in PROB_KEYS], dtype=np.float64)
+    total = probs.sum()
+    probs = probs / total if total > 0 else np.array([0.0, 0.0, 1.0])
+    return probs.round(3).tolist()
+
 
 class SentimentAnalyzer:
-    def __init__(self, model_name='gpt-4.1', verbose=False):
+    def __init__(self, model_name='gpt-4.1', verbose=False, use_cache=True):
         self.client = get_async_client()
         self.model = model_name
         self.pricing = get_model_pricing(model_name)
         self.logger = CostLogger()
+        self.cache = ResponseCache() if use_cache else None
+        # Reasoning is kept here because ground-truth mismatches are reviewed by hand
+        self._system_msg = {'role': 'system', 'content': get_sentiment_prompt(include_reasoning=True)}
         self.verbose = verbose
         
     async def analyze_sentiment_async(self, presentation_text: str, company_name: str = '', 
                                      event_date: str = '', temperature: float = 0.0) -> Dict:
         try:
+            presentation_text = truncate_for_budget(presentation_text, self.model)
+            messages = [
+                self._system_msg,
+                {'role': 'user', 'content': get_user_prompt(presentation_text, company_name, event_date)}
+            ]
+            
+            # Identical request already answered - reuse it without calling the API
+            if self.cache is not None:
+                cache_key = self.cache.make_key(messages, self.model, temperature)
+                cached_result = self.cache.get(cache_key)
+                if cached_result is not None:
+                    return cached_result
+            
             response = await self.client.chat.completions.create(
                 model=self.model,
                 temperature=temperature,
-                messages=[
-                    {'role': 'system', 'content': get_sentiment_prompt()},
-                    {'role': 'user', 'content': get_user_prompt(presentation_text, company_name, event_date)}
-                ],
+                messages=messages,
+                max_tokens=MAX_OUTPUT_TOKENS,
                 response_format={"type": "json_object"}
             )
             
@@ -40,9 +129,10 @@ class SentimentAnalyzer:
             usage = response.usage
             input_tokens = usage.prompt_tokens
             output_tokens = usage.completion_tokens
+            cached_tokens = getattr(usage.prompt_tokens_details, 'cached_tokens', None) or 0
             
-            # Calculate cost
-            cost_breakdown = self.pricing.calculate_cost(input_tokens, output_tokens)
+            # Calculate cost (cached prompt prefix is billed at the cached-input rate)
+            cost_breakdown = self.pricing.calculate_cost(input_tokens, output_tokens, cached_tokens)
             
             # Log the request
             self.logger.log_request(
@@ -53,14 +143,12 @@ class SentimentAnalyzer:
                 metadata={
                     'company': company_name,
                     'event_date': event_date
-                }
+                },
+                cached_tokens=cached_tokens
             )
             
             # Parse result
-            try:
-                result = json.loads(response.choices[0].message.content)
-            except (json.JSONDecodeError, AttributeError, TypeError):
-                result = {}
+            result = parse_sentiment_json(response.choices[0].message.content)
             
             # Validate sentiment
             sentiment = result.get('sentiment', 'neutral').lower()
@@ -68,30 +156,27 @@ class SentimentAnalyzer:
                 sentiment = 'neutral'
             
             # Normalize probabilities
-            pos_prob = float(result.get('positive_prob', 0.0))
-            neg_prob = float(result.get('negative_prob', 0.0))
-            neu_prob = float(result.get('neutral_prob', 0.0))
-            
-            total_prob = pos_prob + neg_prob + neu_prob
-            if total_prob > 0:
-                pos_prob /= total_prob
-                neg_prob /= total_prob
-                neu_prob /= total_prob
-            else:
-                neu_prob = 1.0
+            pos_prob, neg_prob, neu_prob = normalize_probs(result)
             
-            return {
+            analysis = {
                 'sentiment': sentiment,
-                'positive_prob': round(pos_prob, 3),
-                'negative_prob': round(neg_prob, 3),
-                'neutral_prob': round(neu_prob, 3),
+                'positive_prob': pos_prob,
+                'negative_prob': neg_prob,
+                'neutral_prob': neu_prob,
                 'reasoning': result.get('reasoning', ''),
                 'input_tokens': input_tokens,
+                'cached_tokens': cached_tokens,
                 'output_tokens': output_tokens,
                 'total_tokens': input_tokens + output_tokens,
-                'cost': round(cost_breakdown['total_cost'], 6)
+                'cost': round(cost_breakdown['total_cost'], 6),
+                'cached': False
             }
             
+            if self.cache is not None:
+                self.cache.set(cache_key, analysis)
+            
+            return analysis
+            
         except Exception as e:
             if self.verbose:
                 print(f"\n   Error analyzing {company_name}: {e}")
@@ -102,35 +187,40 @@ class SentimentAnalyzer:
                 'neutral_prob': 1.0,
                 'reasoning': f'Error: {str(e)}',
                 'input_tokens': 0,
+                'cached_tokens': 0,
                 'output_tokens': 0,
                 'total_tokens': 0,
-                'cost': 0.0
+                'cost': 0.0,
+                'cached': False
             }
     
     async def analyze_batch_async(self, df_samples: pd.DataFrame) -> List[Dict]:
         """Analyze multiple samples in parallel"""
         
+        # Keep only the fields needed after the gather, not the rows themselves
+        meta = []
         tasks = []
-        for idx, row in df_samples.iterrows():
-            task = self.analyze_sentiment_async(
-                presentation_text=row['presentation_text'],
-                company_name=row['companyname'],
-                event_date=row['event_date']
-            )
-            tasks.append((idx, row, task))
+        for row in df_samples.itertuples(index=True, name='Row'):
+            meta.append((row.Index, row.companyname, row.event_date, row.total_word_count,
+                         getattr(row, 'user_sentiment', None)))
+            tasks.append(self.analyze_sentiment_async(
+                presentation_text=row.presentation_text,
+                company_name=row.companyname,
+                event_date=row.event_date
+            ))
         
         # Execute all tasks in parallel
         if self.verbose:
             print(f"Analyzing {len(tasks)} events in parallel...")
-        results = await asyncio.gather(*[task for _, _, task in tasks])
+        results = await asyncio.gather(*tasks)
         
         # Add metadata
-        for i, (idx, row, _) in enumerate(tasks):
-            results[i]['index'] = idx
-            results[i]['company'] = row['companyname']
-            results[i]['event_date'] = row['event_date']
-            results[i]['word_count'] = row['total_word_count']
-            results[i]['ground_truth'] = row.get('user_sentiment', None)
+        for result, (idx, company, event_date, word_count, ground_truth) in zip(results, meta):
+            result['index'] = idx
+            result['company'] = company
+            result['event_date'] = event_date
+            result['word_count'] = word_count
+            result['ground_truth'] = ground_truth
         
         return results
     
@@ -158,8 +248,8 @@ class SentimentAnalyzer:
                 'error': f'Ground truth file not found: {ground_truth_path}'
             }
         
-        with open(ground_truth_path, 'rb') as f:
-            df_truth = pickle.load(f)
+        # Includes reviewer edits not yet compacted into the snapshot
+        df_truth = load_labels(ground_truth_path)
         
         total = len(df_truth)
         print(f"Loaded {total} labeled samples")
@@ -174,46 +264,27 @@ class SentimentAnalyzer:
         duration = (end_time - start_time).total_seconds()
         
         # Process results
-        correct = 0
-        total_input_tokens = 0
-        total_output_tokens = 0
-        total_cost = 0.0
+        df_results = pd.DataFrame(results).rename(columns={
+            'sentiment': 'gpt_sentiment',
+            'positive_prob': 'gpt_positive_prob',
+            'negative_prob': 'gpt_negative_prob',
+            'neutral_prob': 'gpt_neutral_prob',
+            'reasoning': 'gpt_reasoning'
+        })[['company', 'event_date', 'word_count', 'ground_truth', 'gpt_sentiment',
+            'gpt_positive_prob', 'gpt_negative_prob', 'gpt_neutral_prob', 'gpt_reasoning',
+            'input_tokens', 'cached_tokens', 'output_tokens', 'total_tokens', 'cost', 'cached']]
+        df_results['correct'] = df_results['gpt_sentiment'].to_numpy() == df_results['ground_truth'].to_numpy()
         
-        results_list = []
-        for result in results:
-            gpt_label = result['sentiment']
-            truth_label = result['ground_truth']
-            is_correct = (gpt_label == truth_label)
-            
-            if is_correct:
-                correct += 1
-                status = "MATCH"
-            else:
-                status = "MISS"
-            
-            total_input_tokens += result['input_tokens']
-            total_output_tokens += result['output_tokens']
-            total_cost += result['cost']
-            
-            if self.verbose:
-                print(f"{status} {result['company'][:40]:40s} | Truth:{truth_label:8s} GPT:{gpt_label:8s}")
-            
-            results_list.append({
-                'company': result['company'],
-                'event_date': result['event_date'],
-                'word_count': result['word_count'],
-                'ground_truth': truth_label,
-                'gpt_sentiment': gpt_label,
-                'gpt_positive_prob': result['positive_prob'],
-                'gpt_negative_prob': result['negative_prob'],
-                'gpt_neutral_prob': result['neutral_prob'],
-                'gpt_reasoning': result['reasoning'],
-                'input_tokens': result['input_tokens'],
-                'output_tokens': result['output_tokens'],
-                'total_tokens': result['total_tokens'],
-                'cost': result['cost'],
-                'correct': is_correct
-            })
+        correct = int(df_results['correct'].sum())
+        total_input_tokens = int(df_results['input_tokens'].sum())
+        total_cached_tokens = int(df_results['cached_tokens'].sum())
+        total_output_tokens = int(df_results['output_tokens'].sum())
+        total_cost = float(df_results['cost'].sum())
+        
+        if self.verbose:
+            print(df_results.assign(status=np.where(df_results['correct'], 'MATCH', 'MISS'))[
+                ['status', 'company', 'ground_truth', 'gpt_sentiment']
+            ].to_string(index=False))
         
         # Calculate metrics
         accuracy = correct / total * 100
@@ -227,33 +298,34 @@ class SentimentAnalyzer:
         total_tokens = total_input_tokens + total_output_tokens
         if self.verbose:
             print(f"TOKEN USAGE:")
-            print(f"  Input:  {total_input_tokens:,} tokens")
+            print(f"  Input:  {total_input_tokens:,} tokens ({total_cached_tokens:,} cached)")
             print(f"  Output: {total_output_tokens:,} tokens")
             print(f"  Total:  {total_tokens:,} tokens")
             print(f"  Avg:    {total_tokens / total:,.0f} tokens/event\n")
         
-        # Cost breakdown
-        input_cost = (total_input_tokens / 1_000_000) * self.pricing.input_price
-        output_cost = (total_output_tokens / 1_000_000) * self.pricing.output_price
+        # Cost breakdown, billing cached prompt tokens at the cached rate
+        cost_breakdown = self.pricing.calculate_cost(total_input_tokens, total_output_tokens, total_cached_tokens)
         
         if self.verbose:
             print(f"COST ({self.model}):")
-            print(f"  Input:  ${input_cost:.4f} ({total_input_tokens:,} × ${self.pricing.input_price}/1M)")
-            print(f"  Output: ${output_cost:.4f} ({total_output_tokens:,} × ${self.pricing.output_price}/1M)")
-            print(f"  Total:  ${total_cost:.4f}\n")
+            print(f"  Input:  ${cost_breakdown['input_cost']:.4f} ({total_input_tokens - total_cached_tokens:,} × ${self.pricing.input_price}/1M)")
+            print(f"  Cached: ${cost_breakdown['cached_cost']:.4f} ({total_cached_tokens:,} × ${self.pricing.cached_input_price}/1M)")
+            print(f"  Output: ${cost_breakdown['output_cost']:.4f} ({total_output_tokens:,} × ${self.pricing.output_price}/1M)")
+            print(f"  Total:  ${cost_breakdown['total_cost']:.4f}\n")
         
-        # Extrapolate to full dataset
+        # Extrapolate to full dataset from the events actually sent (cache hits carry no usage)
         events_full = 803
-        full_cost = (total_cost / total) * events_full
-        full_tokens = (total_tokens / total) * events_full
+        billed = df_results[~df_results['cached']]
+        billed_count = max(len(billed), 1)
+        full_cost = (float(billed['cost'].sum()) / billed_count) * events_full
+        full_tokens = (int(billed['total_tokens'].sum()) / billed_count) * events_full
         
         if self.verbose:
-            print(f"EXTRAPOLATION TO {events_full} EVENTS:")
+            print(f"EXTRAPOLATION TO {events_full} EVENTS (from {len(billed)} uncached):")
             print(f"  Tokens: {full_tokens:,.0f}")
             print(f"  Cost:   ${full_cost:.2f}\n")
         
         # Confusion matrix
-        df_results = pd.DataFrame(results_list)
         if self.verbose:
             print("CONFUSION MATRIX:")
             confusion = pd.crosstab(
@@ -269,12 +341,10 @@ class SentimentAnalyzer:
         mismatches = df_results[~df_results['correct']]
         if len(mismatches) > 0 and self.verbose:
             print(f"\nMISMATCHES ({len(mismatches)} events):")
-            for idx, row in mismatches.iterrows():
-                print(f"\n{row['company'][:50]}")
-                print(f"  Truth: {row['ground_truth'].upper()} | GPT: {row['gpt_sentiment'].upper()}")
-                print(f"  Probs: pos={row['gpt_positive_prob']:.2f} neg={row['gpt_negative_prob']:.2f} neu={row['gpt_neutral_prob']:.2f}")
-                print(f"  Cost: ${row['cost']:.4f} ({row['total_tokens']} tokens)")
-                print(f"  Reason: {row['gpt_reasoning'][:100]}...")
+            print(mismatches[[
+                'company', 'ground_truth', 'gpt_sentiment', 'gpt_positive_prob', 'gpt_negative_prob',
+                'gpt_neutral_prob', 'cost', 'total_tokens', 'gpt_reasoning'
+            ]].to_string(index=False, max_colwidth=100))
         
         # Session summary
         if self.verbose:
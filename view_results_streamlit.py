@@ -6,7 +6,9 @@ Usage: streamlit run view_results_streamlit.py
 
 import streamlit as st
 import pickle
+import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
 from pathlib import Path
 import plotly.express as px
 import plotly.graph_objects as go
@@ -18,25 +20,197 @@ st.set_page_config(
     layout="wide"
 )
 
-@st.cache_data
-def load_data(file_path):
-    """Load sentiment results from pickle file"""
+RESULTS_DIR = Path('data/results')
+
+STRING_COLUMNS = ('companyname', 'reasoning')
+TEXT_COLUMN = 'presentation_text'
+TEXT_ROW_GROUP_SIZE = 1000
+VIEWS = {
+    'overview': "📈 Overview",
+    'table': "📋 Data Table",
+    'search': "🔍 Search & Filter",
+    'details': "📄 Details",
+    'raw': "🗂️ Raw Data",
+    'company': "🏢 Company Reports"
+}
+
+# Above these sizes the charts switch to lighter rendering
+BOX_POINTS_LIMIT = 1000
+MAX_DATE_BARS = 90
+MAX_TIMELINE_POINTS = 2000
+
+# Display formats applied client-side; the underlying columns stay numeric
+PROB_FORMAT = st.column_config.NumberColumn(format='%.3f')
+RESULT_COLUMN_CONFIG = {
+    'cost': st.column_config.NumberColumn(format='$%.4f'),
+    'positive_prob': PROB_FORMAT,
+    'negative_prob': PROB_FORMAT,
+    'neutral_prob': PROB_FORMAT
+}
+COMPANY_COLUMN_CONFIG = {
+    'Total Cost': st.column_config.NumberColumn(format='$%.2f'),
+    'Avg Positive Prob': PROB_FORMAT,
+    'Avg Negative Prob': PROB_FORMAT,
+    'Avg Neutral Prob': PROB_FORMAT
+}
+SENTIMENTS = ['positive', 'negative', 'neutral']
+
+def parquet_path(file_path):
+    """Parquet copy of a results file, or None if it is missing or older than the pickle"""
+    path = Path(file_path)
+    parquet = path.with_suffix('.parquet')
+    if not parquet.exists():
+        return None
+    if path.suffix == '.pkl' and path.exists() and path.stat().st_mtime > parquet.stat().st_mtime:
+        return None
+    return parquet
+
+def prepare(df):
+    """Parse dates and convert text columns once per load instead of on every render"""
+    if 'event_date' in df.columns:
+        df['event_date'] = pd.to_datetime(df['event_date'], errors='coerce', cache=True)
+    # Arrow-backed strings: contiguous buffers and vectorized contains/isin/groupby
+    for col in STRING_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('string[pyarrow]')
+    # Three labels: int8 codes make value_counts, isin and groupby index lookups
+    if 'sentiment' in df.columns:
+        df['sentiment'] = pd.Categorical(df['sentiment'], categories=SENTIMENTS)
+    return df
+
+def fmt_date(value):
+    return value.strftime('%Y-%m-%d') if pd.notna(value) else 'Unknown date'
+
+def read_results(file_path):
+    """Read every column of a results file, preferring the Parquet copy and migrating pickles to it once"""
+    parquet = parquet_path(file_path)
+    if parquet is not None:
+        return prepare(pd.read_parquet(parquet, engine='pyarrow'))
+    
     with open(file_path, 'rb') as f:
-        df = pickle.load(f)
+        df = prepare(pickle.load(f))
+    try:
+        # Small row groups let a single presentation text be read without the whole column
+        df.to_parquet(Path(file_path).with_suffix('.parquet'), engine='pyarrow', compression='zstd',
+                      row_group_size=TEXT_ROW_GROUP_SIZE)
+    except (OSError, ValueError, TypeError):
+        pass  # Read-only location or unconvertible column; keep serving the pickle
     return df
 
+@st.cache_data
+def load_data(file_path, mtime):
+    """Load sentiment results without the presentation text, which is read per row on demand"""
+    parquet = parquet_path(file_path)
+    if parquet is None:
+        return read_results(file_path).drop(columns=[TEXT_COLUMN], errors='ignore')
+    cols = [name for name in pq.read_schema(parquet).names
+            if name != TEXT_COLUMN and not name.startswith('__index_level_')]
+    return prepare(pd.read_parquet(parquet, engine='pyarrow', columns=cols))
+
+@st.cache_data
+def get_presentation_text(file_path, mtime, row_idx):
+    """Presentation text of one row, or None; reads only the Parquet row group holding it"""
+    parquet = parquet_path(file_path)
+    if parquet is None:
+        df = read_results(file_path)
+        return df[TEXT_COLUMN].iat[row_idx] if TEXT_COLUMN in df.columns else None
+    
+    parquet_file = pq.ParquetFile(parquet)
+    if TEXT_COLUMN not in parquet_file.schema_arrow.names:
+        return None
+    for group in range(parquet_file.num_row_groups):
+        num_rows = parquet_file.metadata.row_group(group).num_rows
+        if row_idx < num_rows:
+            return parquet_file.read_row_group(group, columns=[TEXT_COLUMN]).column(0)[row_idx].as_py()
+        row_idx -= num_rows
+    return None
+
+# Aggregations below are keyed by (file_path, mtime) so widget changes reuse them and file changes refresh them
+@st.cache_data
+def sentiment_counts(file_path, mtime):
+    counts = load_data(file_path, mtime)['sentiment'].value_counts()
+    return counts[counts > 0]
+
+@st.cache_data
+def sentiment_by_date(file_path, mtime):
+    df_time = load_data(file_path, mtime)
+    # Weekly bars once there are too many dates to draw one bar each
+    date_key = pd.Grouper(key='event_date', freq='W') if df_time['event_date'].nunique() > MAX_DATE_BARS else 'event_date'
+    return df_time.groupby([date_key, 'sentiment'], observed=True).size().reset_index(name='count')
+
+@st.cache_data
+def event_options(file_path, mtime):
+    """Selectbox labels for every event, built with vectorized string concatenation"""
+    df = load_data(file_path, mtime)
+    dates = df['event_date'].dt.strftime('%Y-%m-%d').fillna('Unknown date')
+    return (df.index.astype(str) + ": " + df['companyname'].astype(str) + " - " + dates).tolist()
+
+@st.cache_data
+def company_names_lower(file_path, mtime):
+    """Lowercased company names for plain substring search"""
+    return load_data(file_path, mtime)['companyname'].str.lower()
+
+@st.cache_data
+def reasoning_short(file_path, mtime):
+    """Reasoning clipped to 100 characters, computed once per file with vectorized string ops"""
+    reasoning = load_data(file_path, mtime)['reasoning']
+    clipped = reasoning.str.len().gt(100).fillna(False).to_numpy(dtype=bool)
+    return reasoning.str.slice(0, 100) + np.where(clipped, "...", "")
+
+@st.cache_data
+def page_rows(file_path, mtime, page, rows_per_page):
+    """One page of rows as plain dicts, so the row inspector does dict lookups instead of Series indexing"""
+    start = (page - 1) * rows_per_page
+    return load_data(file_path, mtime).iloc[start:start + rows_per_page].to_dict('records')
+
+@st.cache_data
+def to_csv_bytes(file_path, mtime):
+    return read_results(file_path).to_csv(index=False).encode()
+
+@st.cache_data
+def to_json_bytes(file_path, mtime):
+    return read_results(file_path).to_json(orient='records', indent=2, date_format='iso').encode()
+
+@st.cache_data
+def company_stats(file_path, mtime):
+    df = load_data(file_path, mtime)
+    stats = df.groupby('companyname').agg({
+        'transcriptid': 'count',
+        'positive_prob': 'mean',
+        'negative_prob': 'mean',
+        'neutral_prob': 'mean',
+        'cost': 'sum',
+        'total_tokens': 'sum',
+        'total_word_count': 'sum'
+    })
+    counts = pd.crosstab(df['companyname'], df['sentiment']).reindex(columns=SENTIMENTS, fill_value=0)
+    stats = stats.join(counts).reset_index()
+    
+    stats = stats[['companyname', 'transcriptid', 'positive', 'negative', 'neutral',
+                   'positive_prob', 'negative_prob', 'neutral_prob',
+                   'cost', 'total_tokens', 'total_word_count']]
+    stats.columns = ['Company', 'Total Events', 'Positive', 'Negative', 'Neutral',
+                     'Avg Positive Prob', 'Avg Negative Prob', 'Avg Neutral Prob',
+                     'Total Cost', 'Total Tokens', 'Total Words']
+    
+    # Sort by number of events
+    return stats.sort_values('Total Events', ascending=False)
+
 def main():
     st.title("📊 Sentiment Analysis Results Viewer")
     st.markdown("---")
     
     # File selector
-    results_files = list(Path('data/results').glob('*.pkl')) if Path('data/results').exists() else []
+    # One entry per results file; a migrated pickle and its Parquet copy share a stem
+    results_files = {}
+    for f in sorted(RESULTS_DIR.glob('*.pkl')) + sorted(RESULTS_DIR.glob('*.parquet')):
+        results_files.setdefault(f.stem, f)
     
     if not results_files:
         st.error("❌ No results files found in data/results/")
         return
     
-    file_options = {str(f): f for f in results_files}
+    file_options = {str(f): f for f in results_files.values()}
     selected_file = st.selectbox(
         "Select results file:",
         options=list(file_options.keys()),
@@ -44,7 +218,9 @@ def main():
     )
     
     # Load data
-    df = load_data(file_options[selected_file])
+    file_path = file_options[selected_file]
+    mtime = file_path.stat().st_mtime
+    df = load_data(file_path, mtime)
     
     # Summary metrics
     col1, col2, col3, col4, col5 = st.columns(5)
@@ -63,20 +239,32 @@ def main():
     
     st.markdown("---")
     
-    # Tabs for different views
-    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["📈 Overview", "📋 Data Table", "🔍 Search & Filter", "📄 Details", "🗂️ Raw Data", "🏢 Company Reports"])
+    # View selector; only the active view runs, and the choice is kept in the URL
+    view_keys = list(VIEWS)
+    if 'view' not in st.session_state:
+        requested = st.query_params.get('view')
+        st.session_state.view = requested if requested in VIEWS else view_keys[0]
+    active_view = st.radio(
+        "View:",
+        view_keys,
+        format_func=VIEWS.get,
+        horizontal=True,
+        label_visibility="collapsed",
+        key='view'
+    )
+    st.query_params['view'] = active_view
     
-    with tab1:
+    if active_view == 'overview':
         # Sentiment distribution
         col1, col2 = st.columns(2)
         
         with col1:
             st.subheader("Sentiment Distribution")
-            sentiment_counts = df['sentiment'].value_counts()
+            counts = sentiment_counts(file_path, mtime)
             fig_pie = px.pie(
-                values=sentiment_counts.values,
-                names=sentiment_counts.index,
-                color=sentiment_counts.index,
+                values=counts.values,
+                names=counts.index,
+                color=counts.index,
                 color_discrete_map={'positive': '#00CC96', 'negative': '#EF553B', 'neutral': '#636EFA'},
                 hole=0.4
             )
@@ -84,7 +272,7 @@ def main():
             st.plotly_chart(fig_pie, use_container_width=True)
             
             # Show counts
-            for sentiment, count in sentiment_counts.items():
+            for sentiment, count in counts.items():
                 pct = count / len(df) * 100
                 st.write(f"**{sentiment.upper()}**: {count} ({pct:.1f}%)")
         
@@ -93,7 +281,7 @@ def main():
             fig_box = px.box(
                 df,
                 y='cost',
-                points='all',
+                points='all' if len(df) <= BOX_POINTS_LIMIT else 'outliers',
                 title='Cost per Event'
             )
             st.plotly_chart(fig_box, use_container_width=True)
@@ -106,12 +294,8 @@ def main():
         
         # Sentiment over time
         st.subheader("Sentiment by Date")
-        df_time = df.copy()
-        df_time['event_date'] = pd.to_datetime(df_time['event_date'])
-        sentiment_by_date = df_time.groupby(['event_date', 'sentiment']).size().reset_index(name='count')
-        
         fig_time = px.bar(
-            sentiment_by_date,
+            sentiment_by_date(file_path, mtime),
             x='event_date',
             y='count',
             color='sentiment',
@@ -120,7 +304,7 @@ def main():
         )
         st.plotly_chart(fig_time, use_container_width=True)
     
-    with tab2:
+    elif active_view == 'table':
         st.subheader("All Events")
         
         # Column selector
@@ -135,48 +319,48 @@ def main():
         )
         
         if selected_columns:
-            display_df = df[selected_columns].copy()
-            
-            # Format specific columns
-            if 'cost' in selected_columns:
-                display_df['cost'] = display_df['cost'].apply(lambda x: f"${x:.4f}")
+            display_df = df[selected_columns]
             
-            st.dataframe(display_df, use_container_width=True, height=600)
+            st.dataframe(display_df, column_config=RESULT_COLUMN_CONFIG, use_container_width=True, height=600)
             
             # Download button
-            csv = df.to_csv(index=False)
             st.download_button(
                 label="📥 Download Full Dataset as CSV",
-                data=csv,
+                data=to_csv_bytes(file_path, mtime),
                 file_name="sentiment_results.csv",
                 mime="text/csv"
             )
     
-    with tab3:
+    elif active_view == 'search':
         st.subheader("Search & Filter")
         
-        # Filters
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # Sentiment filter
-            sentiment_filter = st.multiselect(
-                "Filter by Sentiment:",
-                options=['positive', 'negative', 'neutral'],
-                default=['positive', 'negative', 'neutral']
-            )
-        
-        with col2:
-            # Company search
-            company_search = st.text_input("Search by Company Name:")
+        # Filters apply on submit rather than on every keystroke
+        with st.form("search_form"):
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                # Sentiment filter
+                sentiment_filter = st.multiselect(
+                    "Filter by Sentiment:",
+                    options=SENTIMENTS,
+                    default=SENTIMENTS
+                )
+            
+            with col2:
+                # Company search
+                company_search = st.text_input("Search by Company Name:")
+            
+            st.form_submit_button("Search")
         
         # Apply filters
-        filtered_df = df[df['sentiment'].isin(sentiment_filter)]
+        mask = df['sentiment'].isin(sentiment_filter)
         
         if company_search:
-            filtered_df = filtered_df[
-                filtered_df['companyname'].str.contains(company_search, case=False, na=False)
-            ]
+            mask &= company_names_lower(file_path, mtime).str.contains(
+                company_search.lower(), regex=False, na=False
+            )
+        
+        filtered_df = df[mask]
         
         st.write(f"**Found {len(filtered_df)} events**")
         
@@ -184,33 +368,32 @@ def main():
         if len(filtered_df) > 0:
             display_cols = ['companyname', 'event_date', 'sentiment', 'positive_prob', 
                           'negative_prob', 'neutral_prob', 'reasoning']
-            display_filtered = filtered_df[display_cols].copy()
-            display_filtered['reasoning'] = display_filtered['reasoning'].apply(
-                lambda x: x[:100] + "..." if len(x) > 100 else x
-            )
+            display_filtered = filtered_df[display_cols].assign(reasoning=reasoning_short(file_path, mtime))
             
-            st.dataframe(display_filtered, use_container_width=True, height=500)
+            st.dataframe(display_filtered, column_config=RESULT_COLUMN_CONFIG, use_container_width=True, height=500)
             
             # Top expensive in filtered results
             st.subheader("Top 10 Most Expensive (from filtered results)")
-            top_expensive = filtered_df.nlargest(10, 'cost')[
+            # Partial selection of the 10 largest costs, then sort just those
+            costs = np.nan_to_num(filtered_df['cost'].to_numpy(dtype=float), nan=-np.inf)
+            top_k = min(10, len(costs))
+            top_idx = np.argpartition(costs, -top_k)[-top_k:]
+            top_expensive = filtered_df.iloc[top_idx].sort_values('cost', ascending=False)[
                 ['companyname', 'event_date', 'total_word_count', 'total_tokens', 'cost']
             ]
-            st.dataframe(top_expensive, use_container_width=True)
+            st.dataframe(top_expensive, column_config=RESULT_COLUMN_CONFIG, use_container_width=True)
     
-    with tab4:
+    elif active_view == 'details':
         st.subheader("Detailed Event View")
         
         # Event selector
-        event_options = [
-            f"{idx}: {row['companyname']} - {row['event_date']}"
-            for idx, row in df.iterrows()
-        ]
+        # st.selectbox formats every option on each run, so labels come from a cached list built once per file
+        event_labels = event_options(file_path, mtime)
         
         selected_event = st.selectbox(
             "Select an event:",
-            options=range(len(df)),
-            format_func=lambda x: event_options[x]
+            options=range(len(event_labels)),
+            format_func=event_labels.__getitem__
         )
         
         if selected_event is not None:
@@ -221,7 +404,7 @@ def main():
             
             with col1:
                 st.markdown(f"### {event['companyname']}")
-                st.write(f"**Date**: {event['event_date']}")
+                st.write(f"**Date**: {fmt_date(event['event_date'])}")
                 if 'headline' in event:
                     st.write(f"**Headline**: {event['headline']}")
             
@@ -268,16 +451,17 @@ def main():
                 st.metric("Cost", f"${event['cost']:.4f}")
             
             # Presentation text
-            if 'presentation_text' in event:
+            presentation_text = get_presentation_text(file_path, mtime, selected_event)
+            if presentation_text is not None:
                 with st.expander("📄 View Full Presentation Text"):
                     st.text_area(
                         "Presentation",
-                        value=event['presentation_text'],
+                        value=presentation_text,
                         height=400,
                         disabled=True
                     )
     
-    with tab5:
+    elif active_view == 'raw':
         st.subheader("🗂️ Complete Raw Data View")
         st.write("Browse all rows with complete information including presentation texts")
         
@@ -291,55 +475,67 @@ def main():
         
         st.write(f"Showing rows {start_idx + 1} to {end_idx} of {len(df)}")
         
-        # Display paginated data
-        for idx in range(start_idx, end_idx):
-            row = df.iloc[idx]
+        # Display paginated data as one table; full text lives in the row inspector below
+        page_df = df.iloc[start_idx:end_idx]
+        st.dataframe(
+            page_df,
+            column_config=RESULT_COLUMN_CONFIG,
+            use_container_width=True
+        )
+        
+        rows = page_rows(file_path, mtime, page, rows_per_page)
+        idx = st.selectbox(
+            "Inspect row:",
+            options=range(start_idx, end_idx),
+            format_func=lambda i: f"Row {i}: {rows[i - start_idx]['companyname']} - {fmt_date(rows[i - start_idx]['event_date'])}"
+        )
+        row = rows[idx - start_idx]
+        
+        # Create two columns for better layout
+        col1, col2 = st.columns([1, 1])
+        
+        with col1:
+            st.markdown("#### 📋 Event Information")
+            st.write(f"**Company ID**: {row['companyid']}")
+            st.write(f"**Company Name**: {row['companyname']}")
+            st.write(f"**Transcript ID**: {row['transcriptid']}")
+            st.write(f"**Event Date**: {fmt_date(row['event_date'])}")
+            if 'headline' in row and pd.notna(row['headline']):
+                st.write(f"**Headline**: {row['headline']}")
             
-            with st.expander(f"**Row {idx}**: {row['companyname']} - {row['event_date']} - {row['sentiment'].upper()}"):
-                # Create two columns for better layout
-                col1, col2 = st.columns([1, 1])
-                
-                with col1:
-                    st.markdown("#### 📋 Event Information")
-                    st.write(f"**Company ID**: {row['companyid']}")
-                    st.write(f"**Company Name**: {row['companyname']}")
-                    st.write(f"**Transcript ID**: {row['transcriptid']}")
-                    st.write(f"**Event Date**: {row['event_date']}")
-                    if 'headline' in row and pd.notna(row['headline']):
-                        st.write(f"**Headline**: {row['headline']}")
-                    
-                    st.markdown("#### 💭 Sentiment Analysis")
-                    st.write(f"**Sentiment**: {row['sentiment'].upper()}")
-                    st.write(f"**Positive Prob**: {row['positive_prob']:.3f}")
-                    st.write(f"**Negative Prob**: {row['negative_prob']:.3f}")
-                    st.write(f"**Neutral Prob**: {row['neutral_prob']:.3f}")
-                    st.write(f"**Reasoning**: {row['reasoning']}")
-                
-                with col2:
-                    st.markdown("#### 📊 Metrics")
-                    st.write(f"**Word Count**: {row['total_word_count']:,}")
-                    st.write(f"**Input Tokens**: {row['input_tokens']:,}")
-                    st.write(f"**Output Tokens**: {row['output_tokens']:,}")
-                    st.write(f"**Total Tokens**: {row['total_tokens']:,}")
-                    st.write(f"**Cost**: ${row['cost']:.6f}")
-                    
-                    if 'success' in row:
-                        st.write(f"**Success**: {row['success']}")
-                    if 'attempts' in row:
-                        st.write(f"**Attempts**: {row['attempts']}")
-                
-                # Full presentation text
-                if 'presentation_text' in row and pd.notna(row['presentation_text']):
-                    st.markdown("#### 📄 Full Presentation Text")
-                    st.text_area(
-                        f"Presentation Text (Row {idx})",
-                        value=row['presentation_text'],
-                        height=300,
-                        key=f"presentation_{idx}",
-                        disabled=True
-                    )
-                
-                st.markdown("---")
+            st.markdown("#### 💭 Sentiment Analysis")
+            st.write(f"**Sentiment**: {row['sentiment'].upper()}")
+            st.write(f"**Positive Prob**: {row['positive_prob']:.3f}")
+            st.write(f"**Negative Prob**: {row['negative_prob']:.3f}")
+            st.write(f"**Neutral Prob**: {row['neutral_prob']:.3f}")
+            st.write(f"**Reasoning**: {row['reasoning']}")
+        
+        with col2:
+            st.markdown("#### 📊 Metrics")
+            st.write(f"**Word Count**: {row['total_word_count']:,}")
+            st.write(f"**Input Tokens**: {row['input_tokens']:,}")
+            st.write(f"**Output Tokens**: {row['output_tokens']:,}")
+            st.write(f"**Total Tokens**: {row['total_tokens']:,}")
+            st.write(f"**Cost**: ${row['cost']:.6f}")
+            
+            if 'success' in row:
+                st.write(f"**Success**: {row['success']}")
+            if 'attempts' in row:
+                st.write(f"**Attempts**: {row['attempts']}")
+        
+        # Full presentation text
+        presentation_text = get_presentation_text(file_path, mtime, idx)
+        if presentation_text is not None and pd.notna(presentation_text):
+            st.markdown("#### 📄 Full Presentation Text")
+            st.text_area(
+                f"Presentation Text (Row {idx})",
+                value=presentation_text,
+                height=300,
+                key=f"presentation_{idx}",
+                disabled=True
+            )
+        
+        st.markdown("---")
         
         # Download complete raw data
         st.markdown("### 📥 Export Options")
@@ -347,56 +543,37 @@ def main():
         
         with col1:
             # Full CSV export
-            csv_full = df.to_csv(index=False)
             st.download_button(
                 label="Download Full Dataset (CSV)",
-                data=csv_full,
+                data=to_csv_bytes(file_path, mtime),
                 file_name="sentiment_results_full.csv",
                 mime="text/csv"
             )
         
         with col2:
             # JSON export with all data
-            json_data = df.to_json(orient='records', indent=2)
             st.download_button(
                 label="Download Full Dataset (JSON)",
-                data=json_data,
+                data=to_json_bytes(file_path, mtime),
                 file_name="sentiment_results_full.json",
                 mime="application/json"
             )
     
-    with tab6:
+    elif active_view == 'company':
         st.subheader("🏢 Company-Level Reports")
         st.write("Aggregated sentiment analysis by company")
         
-        # Create company-level aggregation
-        company_stats = df.groupby('companyname').agg({
-            'transcriptid': 'count',
-            'sentiment': lambda x: x.value_counts().to_dict(),
-            'positive_prob': 'mean',
-            'negative_prob': 'mean',
-            'neutral_prob': 'mean',
-            'cost': 'sum',
-            'total_tokens': 'sum',
-            'total_word_count': 'sum'
-        }).reset_index()
-        
-        company_stats.columns = ['Company', 'Total Events', 'Sentiment Distribution', 
-                                'Avg Positive Prob', 'Avg Negative Prob', 'Avg Neutral Prob',
-                                'Total Cost', 'Total Tokens', 'Total Words']
-        
-        # Sort by number of events
-        company_stats = company_stats.sort_values('Total Events', ascending=False)
+        company_stats_df = company_stats(file_path, mtime)
         
         # Summary stats
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("Total Companies", len(company_stats))
+            st.metric("Total Companies", len(company_stats_df))
         with col2:
-            avg_events = company_stats['Total Events'].mean()
+            avg_events = company_stats_df['Total Events'].mean()
             st.metric("Avg Events/Company", f"{avg_events:.1f}")
         with col3:
-            max_events = company_stats['Total Events'].max()
+            max_events = company_stats_df['Total Events'].max()
             st.metric("Max Events/Company", int(max_events))
         
         st.markdown("---")
@@ -407,34 +584,14 @@ def main():
         if view_mode == "Summary Table":
             st.subheader("Company Summary Table")
             
-            # Prepare display dataframe
-            display_company = company_stats.copy()
-            
-            # Extract sentiment counts
-            display_company['Positive'] = display_company['Sentiment Distribution'].apply(
-                lambda x: x.get('positive', 0)
-            )
-            display_company['Negative'] = display_company['Sentiment Distribution'].apply(
-                lambda x: x.get('negative', 0)
-            )
-            display_company['Neutral'] = display_company['Sentiment Distribution'].apply(
-                lambda x: x.get('neutral', 0)
-            )
-            
-            # Format columns
-            display_company['Total Cost'] = display_company['Total Cost'].apply(lambda x: f"${x:.2f}")
-            display_company['Avg Positive Prob'] = display_company['Avg Positive Prob'].apply(lambda x: f"{x:.3f}")
-            display_company['Avg Negative Prob'] = display_company['Avg Negative Prob'].apply(lambda x: f"{x:.3f}")
-            display_company['Avg Neutral Prob'] = display_company['Avg Neutral Prob'].apply(lambda x: f"{x:.3f}")
-            
             # Select columns for display
-            final_display = display_company[[
+            final_display = company_stats_df[[
                 'Company', 'Total Events', 'Positive', 'Negative', 'Neutral',
                 'Avg Positive Prob', 'Avg Negative Prob', 'Avg Neutral Prob',
                 'Total Tokens', 'Total Cost'
             ]]
             
-            st.dataframe(final_display, use_container_width=True, height=600)
+            st.dataframe(final_display, column_config=COMPANY_COLUMN_CONFIG, use_container_width=True, height=600)
             
             # Download button
             csv = final_display.to_csv(index=False)
@@ -451,12 +608,12 @@ def main():
             # Company selector
             selected_company = st.selectbox(
                 "Select Company:",
-                options=company_stats['Company'].tolist()
+                options=company_stats_df['Company'].tolist()
             )
             
             if selected_company:
                 # Get company data
-                company_row = company_stats[company_stats['Company'] == selected_company].iloc[0]
+                company_row = company_stats_df[company_stats_df['Company'] == selected_company].iloc[0]
                 company_events = df[df['companyname'] == selected_company]
                 
                 # Header
@@ -480,7 +637,10 @@ def main():
                 
                 with col1:
                     st.subheader("Sentiment Distribution")
-                    sentiment_dist = company_row['Sentiment Distribution']
+                    sentiment_dist = {
+                        sentiment: int(company_row[sentiment.capitalize()])
+                        for sentiment in SENTIMENTS if company_row[sentiment.capitalize()] > 0
+                    }
                     
                     fig_company_pie = px.pie(
                         values=list(sentiment_dist.values()),
@@ -519,16 +679,20 @@ def main():
                 # Timeline of events
                 st.subheader("Events Timeline")
                 company_events_sorted = company_events.sort_values('event_date')
-                company_events_sorted['event_date_dt'] = pd.to_datetime(company_events_sorted['event_date'])
+                # Stride-sample very long timelines so the browser gets a bounded number of points
+                if len(company_events_sorted) > MAX_TIMELINE_POINTS:
+                    step = (len(company_events_sorted) - 1) // MAX_TIMELINE_POINTS + 1
+                    company_events_sorted = company_events_sorted.iloc[::step]
                 
                 fig_timeline = px.scatter(
                     company_events_sorted,
-                    x='event_date_dt',
+                    x='event_date',
                     y='sentiment',
                     color='sentiment',
                     color_discrete_map={'positive': '#00CC96', 'negative': '#EF553B', 'neutral': '#636EFA'},
                     hover_data=['headline', 'positive_prob', 'negative_prob', 'neutral_prob'],
-                    title=f"Sentiment Over Time - {selected_company}"
+                    title=f"Sentiment Over Time - {selected_company}",
+                    render_mode='webgl'
                 )
                 st.plotly_chart(fig_timeline, use_container_width=True)
                 
@@ -537,9 +701,8 @@ def main():
                 event_display = company_events[[
                     'event_date', 'sentiment', 'positive_prob', 'negative_prob', 'neutral_prob',
                     'reasoning', 'total_tokens', 'cost'
-                ]].copy()
-                event_display['cost'] = event_display['cost'].apply(lambda x: f"${x:.4f}")
-                st.dataframe(event_display, use_container_width=True)
+                ]]
+                st.dataframe(event_display, column_config=RESULT_COLUMN_CONFIG, use_container_width=True)
 
 if __name__ == "__main__":
     main()